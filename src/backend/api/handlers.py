@@ -3,73 +3,140 @@ from __future__ import annotations
 
 import datetime
 import json
-from itertools import zip_longest
+import os
+import shutil
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import (
+    islice,
+    zip_longest,
+)
+from typing import (
+    Iterable,
+    Iterator,
+)
 
 from flask import (
+    Flask,
+    current_app,
     request,
-    url_for,
     session,
     g,
 )
 from flask_github import GitHub
-from sqlalchemy import asc
-from sqlalchemy_pagination import (
-    Page,
-    paginate,
-)
-from werkzeug.test import TestResponse
+from sqlalchemy.orm import joinedload
+from sqlalchemy_pagination import Page
 
-from api.exceptions import BadRequestFormatExceptioin
+from api.exceptions import (
+    BadRequestFormatExceptioin,
+    DBRecordNotFound,
+)
 from api.utils import (
-    create_flask_client,
     is_our_member,
-    raise_for_status,
+    user_cache,
+    validate_json_data,
 )
+from common.cache import LRUCache
 from common.forms import (
     AddAction,
     AddGroupActions,
     BulkUpload,
 )
+from common.json_stream import (
+    JSONFieldNotFound,
+    iter_json_array_items,
+)
+from common.metrics import (
+    observe_bulk_upload_chunk,
+    observe_bulk_upload_failure,
+    observe_dump,
+)
 from common.sentry import (
     get_logger,
 )
 from db.data_models import (
+    ACTION_JSON_FIELDS,
     ActionData,
+    ActionFiltersData,
     ActionType,
     GENERIC_OS_NAME,
     UserData,
     GitHubOrgData,
     ActionHistoryData,
     GroupActionsData,
+    BulkUploadJobData,
 )
 from db.db_models import (
     Action,
     User,
     GitHubOrg,
     ActionHistory,
-    Package,
     Group,
+    DatasetVersion,
+    BulkUploadJob,
+)
+from db.pagination import (
+    KeysetPage,
+    paginate_by_keyset,
+    paginate_query,
 )
 from db.utils import session_scope
 
 logger = get_logger(__name__)
 
 PAGE_SIZE = 20
+SEARCH_ACTIONS_LIMIT = 100
+DUMP_CHUNK_SIZE = 500
+DUMP_CACHE_SIZE = int(os.environ.get('DUMP_CACHE_SIZE', 32))
+BULK_UPLOAD_CHUNK_SIZE = int(os.environ.get('BULK_UPLOAD_CHUNK_SIZE', 500))
+BULK_UPLOAD_WORKERS = int(os.environ.get('BULK_UPLOAD_WORKERS', 1))
+# seconds, a running bulk upload job without progress for that time is failed
+BULK_UPLOAD_JOB_TIMEOUT = int(os.environ.get('BULK_UPLOAD_JOB_TIMEOUT', 600))
+# endpoints which don't depend on a logged user
+ANONYMOUS_ENDPOINTS = (
+    'static',
+    'dump',
+    'metrics',
+)
+
+dump_cache = LRUCache(max_size=DUMP_CACHE_SIZE, name='dump')
+# threads are started on the first submitted run of pending jobs
+bulk_upload_executor = ThreadPoolExecutor(
+    max_workers=BULK_UPLOAD_WORKERS,
+    thread_name_prefix='bulk_upload',
+)
+
+
+def _load_user_data(github_id: int) -> UserData | None:
+    """
+    Load a user with its organizations by one query
+    """
+    with session_scope() as db_session:
+        db_user = db_session.query(User).filter_by(
+            github_id=github_id,
+        ).options(
+            joinedload(User.github_orgs),
+        ).one_or_none()  # type: User
+        if db_user is None:
+            return
+        return db_user.to_dataclass()
 
 
 def before_request_handler():
-    g.user_data = None
-    if 'github_id' in session:
-        with session_scope() as db_session:
-            db_user = db_session.query(User).filter_by(
-                github_id=session.get('github_id'),
-            ).one_or_none()  # type: User
-            if db_user is not None:
-                g.user_data = db_user.to_dataclass()
-                return
-            else:
-                session.pop('github_id')
     g.user_data = UserData()
+    if request.endpoint in ANONYMOUS_ENDPOINTS or 'github_id' not in session:
+        return
+    github_id = session['github_id']
+    user_data = user_cache.get(github_id)
+    if user_data is None:
+        user_data = _load_user_data(github_id)
+        if user_data is None:
+            session.pop('github_id')
+            return
+        user_cache.set(github_id, user_data)
+    g.user_data = user_data
 
 
 def authorized_handler(access_token: str, github: GitHub):
@@ -125,6 +192,36 @@ def authorized_handler(access_token: str, github: GitHub):
             'github_id': db_user.github_id,
             'is_our_member': is_our_member(github=github)
         })
+    # the user's token and organizations are changed
+    user_cache.delete(session['github_id'])
+
+
+def create_action_data(json_data: dict) -> ActionData:
+    """
+    Create an action dataclass from JSON and approve it
+    if the current user is a member of the action's organization
+    """
+    action = ActionData.create_from_json(json_data)
+    action.is_approved = action.is_approved or \
+        g.user_data.is_in_org(action.github_org.name)
+    return action
+
+
+def save_action(json_data: dict, is_new: bool) -> None:
+    """
+    Validate JSON of an action and create or modify the action.
+    The views use it directly instead of doing requests to `/api/actions`
+    """
+    validate_json_data(
+        json_data=json_data,
+        rule='/api/actions',
+        method='PUT' if is_new else 'POST',
+    )
+    action = create_action_data(json_data)
+    if is_new:
+        push_action(action)
+    else:
+        modify_action(action)
 
 
 def push_action(action_data: ActionData) -> None:
@@ -154,6 +251,7 @@ def get_actions(
                 Action.search_by_dataclass(
                     action_data=action_data,
                     session=db_session,
+                    eager_load=True,
                 )]
 
 
@@ -180,107 +278,419 @@ def modify_action(action_data: ActionData) -> None:
         )
 
 
+def _is_action_in_releases(
+        action: ActionData,
+        oses: dict[int, str],
+) -> bool:
+    """
+    Check that releases of an action are generic or belong to passed OSes
+    """
+    if (action.source_release is None or action.source_release.os_name in (
+            GENERIC_OS_NAME,
+            oses[action.source_release.major_version],
+    )) and (
+            action.target_release is None or action.target_release.os_name
+            in (
+                GENERIC_OS_NAME,
+                oses[action.target_release.major_version],
+            )
+    ):
+        return True
+    return False
+
+
+def _get_dump_header() -> dict[str, str]:
+    return {
+        'legal_notice': f'Copyright (c) {datetime.datetime.utcnow().year} '
+                        f'Oracle, AlmaLinux OS Foundation',
+        'timestamp': datetime.datetime.strftime(
+            datetime.datetime.now(),
+            # YearMonthDayHoursMinutesZ
+            '%Y%m%d%H%MZ',
+        ),
+    }
+
+
 def dump_pes_json(
         oses: dict[int, str],
         organizations: list[str],
         groups: list[str],
         only_approved: bool,
 ):
+    started_at = time.perf_counter()
     oses = {int(key): value for key, value in oses.items()}
-    legal_notice_value = f'Copyright (c) {datetime.datetime.utcnow().year} ' \
-                         f'Oracle, AlmaLinux OS Foundation'
-
-    def filter_action_by_releases(
-            action: ActionData,
-    ) -> bool:
-        if (action.source_release is None or action.source_release.os_name in (
-                GENERIC_OS_NAME,
-                oses[action.source_release.major_version],
-        )) and (
-                action.target_release is None or action.target_release.os_name
-                in (
-                    GENERIC_OS_NAME,
-                    oses[action.target_release.major_version],
-                )
-        ):
-            return True
-        return False
-
-    actions = []
-    if not organizations and not groups:
-        actions = get_actions(
-            action_data=ActionData(
-                is_approved=True if only_approved else None,
-            )
-        )
-    for org in organizations:
-        github_org = get_github_org(
-            github_org_data=GitHubOrgData(github_id=int(org))
+    with session_scope() as db_session:
+        actions_query = Action.search_for_dump(
+            session=db_session,
+            only_approved=only_approved,
+            github_orgs_ids=[int(org) for org in organizations],
+            groups_ids=[int(group) for group in groups],
         )
-        actions.extend(action for action in get_actions(
-            action_data=ActionData(
-                is_approved=True if only_approved else None,
-                github_org=github_org,
-            )
-        ) if action not in actions)
-    for group in groups:
-        actions.extend(
-            action for action in get_group_actions(
-                group_id=int(group),
+        actions = [action.to_dataclass() for action in actions_query]
+    actions = [
+        action.dump(oses=oses) for action in actions if
+        _is_action_in_releases(action, oses)
+    ]
+    result = _get_dump_header()
+    result['packageinfo'] = actions
+    observe_dump(
+        mode='full',
+        duration=time.perf_counter() - started_at,
+        actions_count=len(actions),
+    )
+
+    return result
+
+
+def get_cached_pes_json(
+        oses: dict[int, str],
+        organizations: list[str],
+        groups: list[str],
+        only_approved: bool,
+) -> str:
+    """
+    Return serialized PES JSON from the cache of dumps.
+    A dump is built only if the dataset was changed since the last build
+    of a dump with the same parameters
+    """
+    with session_scope() as db_session:
+        dataset_version = DatasetVersion.get_version(session=db_session)
+    cache_key = (
+        tuple(sorted((int(key), value) for key, value in oses.items())),
+        tuple(sorted(int(org) for org in organizations)),
+        tuple(sorted(int(group) for group in groups)),
+        bool(only_approved),
+        dataset_version,
+    )
+    result = dump_cache.get(cache_key)
+    if result is None:
+        result = json.dumps(
+            dump_pes_json(
+                oses=oses,
+                organizations=organizations,
+                groups=groups,
                 only_approved=only_approved,
+            ),
+            indent=2,
+            sort_keys=True,
+        ) + '\n'
+        dump_cache.set(cache_key, result)
+    return result
+
+
+def stream_pes_json(
+        oses: dict[int, str],
+        organizations: list[str],
+        groups: list[str],
+        only_approved: bool,
+) -> Iterator[str]:
+    """
+    Generate PES JSON by chunks.
+    The header is yielded at once and then every item of `packageinfo`
+    is yielded as soon as it's fetched from DB, so memory consumption
+    doesn't depend on count of actions
+    """
+    started_at = time.perf_counter()
+    actions_count = 0
+    oses = {int(key): value for key, value in oses.items()}
+    yield '{\n'
+    for key, value in _get_dump_header().items():
+        yield f'  {json.dumps(key)}: {json.dumps(value)},\n'
+    yield '  "packageinfo": ['
+    separator = '\n'
+    with session_scope() as db_session:
+        actions_query = Action.search_for_dump(
+            session=db_session,
+            only_approved=only_approved,
+            github_orgs_ids=[int(org) for org in organizations],
+            groups_ids=[int(group) for group in groups],
+        )
+        for action in actions_query.yield_per(DUMP_CHUNK_SIZE):
+            action_data = action.to_dataclass()
+            if not _is_action_in_releases(action_data, oses):
+                continue
+            yield separator + json.dumps(
+                action_data.dump(oses=oses),
+                sort_keys=True,
             )
-            if action not in actions
+            separator = ',\n'
+            actions_count += 1
+    yield '\n  ]\n}\n'
+    observe_dump(
+        mode='stream',
+        duration=time.perf_counter() - started_at,
+        actions_count=actions_count,
+    )
+
+
+def prepare_bulk_upload_action(
+        action: dict,
+        github_org: dict[str, str | int],
+) -> dict:
+    """
+    Convert an action from a PES JSON file to the JSON format of the API
+    """
+    action['action'] = ActionType.get_name(action['action'])
+    action['org'] = github_org
+    action.pop('id', None)
+    for root_key in (
+        'initial_release',
+        'release',
+        'in_packageset',
+        'out_packageset',
+    ):
+        for unnecessary_key in (
+            'modified',
+            'tag',
+            'z_stream',
+            'set_id',
+        ):
+            (action.get(root_key) or {}).pop(unnecessary_key, None)
+    return action
+
+
+def ingest_actions(json_actions: list[dict]) -> int:
+    """
+    Validate and create a chunk of actions in one transaction
+    :return: count of created actions
+    """
+    started_at = time.perf_counter()
+    actions_data = []
+    for json_action in json_actions:
+        validate_json_data(
+            json_data=json_action,
+            rule='/api/actions',
+            method='PUT',
         )
-    actions = sorted([
-        action.dump(oses=oses) for action in actions if
-        filter_action_by_releases(action)
-    ], key=lambda i: i['id'])
-    result = {
-        'legal_notice': legal_notice_value,
-        'timestamp': datetime.datetime.strftime(
-            datetime.datetime.now(),
-            # YearMonthDayHoursMinutesZ
-            '%Y%m%d%H%MZ',
-        ),
-        'packageinfo': actions,
+        actions_data.append(create_action_data(json_action))
+    with session_scope() as db_session:
+        created_count = len(Action.bulk_create_from_dataclasses(
+            actions_data=actions_data,
+            session=db_session,
+        ))
+    observe_bulk_upload_chunk(
+        duration=time.perf_counter() - started_at,
+        processed_count=len(json_actions),
+        created_count=created_count,
+    )
+    return created_count
+
+
+def _get_bulk_upload_org(
+        bulk_upload_form: BulkUpload,
+) -> dict[str, str | int]:
+    org_choices_dict = dict(bulk_upload_form.org.choices)
+    return {
+        'name': org_choices_dict[bulk_upload_form.org.data],
+        'github_id': int(bulk_upload_form.org.data),
     }
 
-    return result
 
+def _iter_actions_chunks(actions: Iterable[dict]) -> Iterator[list[dict]]:
+    actions = iter(actions)
+    while True:
+        try:
+            chunk = list(islice(actions, BULK_UPLOAD_CHUNK_SIZE))
+        except JSONFieldNotFound:
+            raise BadRequestFormatExceptioin(
+                'The JSON has no field "packageinfo"',
+            )
+        except json.JSONDecodeError:
+            raise BadRequestFormatExceptioin('The JSON file is incorrect')
+        if not chunk:
+            return
+        yield chunk
 
-def bulk_upload_handler(json_dict: dict, bulk_upload_form: BulkUpload) -> None:
-    if 'packageinfo' not in json_dict:
-        raise BadRequestFormatExceptioin('The JSON has no field "packageinfo"')
-    actions = json_dict['packageinfo']
-    org_choices_dict = dict(bulk_upload_form.org.choices)
-    for i, action in enumerate(actions):
-        action['action'] = ActionType.get_name(action['action'])
-        action['org'] = {
-            'name': org_choices_dict[bulk_upload_form.org.data],
-            'github_id': int(bulk_upload_form.org.data),
-        }
-        action.pop('id', None)
-        for root_key in (
-            'initial_release',
-            'release',
-            'in_packageset',
-            'out_packageset',
-        ):
-            for unnecessary_key in (
-                'modified',
-                'tag',
-                'z_stream',
-                'set_id',
-            ):
-                (action.get(root_key) or {}).pop(unnecessary_key, None)
-        logger.info('Uploaded action "%s" from "%s"', i, len(actions))
-        result = create_flask_client().put(
-            url_for('actions'),
-            data=json.dumps(action),
-            headers=list(request.headers),
-            content_type='application/json',
+
+def bulk_upload_handler(
+        actions: Iterable[dict],
+        bulk_upload_form: BulkUpload,
+) -> None:
+    """
+    Ingest actions by chunks while they are being read from an uploaded file
+    :param actions: items of field `packageinfo` of an uploaded PES file
+    :param bulk_upload_form: submitted form of a bulk upload
+    """
+    github_org = _get_bulk_upload_org(bulk_upload_form)
+    processed_count = 0
+    for chunk in _iter_actions_chunks(actions):
+        created_count = ingest_actions([
+            prepare_bulk_upload_action(action=action, github_org=github_org)
+            for action in chunk
+        ])
+        processed_count += len(chunk)
+        logger.info(
+            'Uploaded actions "%s", created "%s"',
+            processed_count,
+            created_count,
         )
-        raise_for_status(result)
+
+
+def _remove_uploaded_file(file_path: str | None) -> None:
+    if file_path is None:
+        return
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+def _run_bulk_upload_job(app: Flask, bulk_upload_job: BulkUploadJob) -> None:
+    job_id = bulk_upload_job.id
+    github_org = {
+        'name': bulk_upload_job.github_org_name,
+        'github_id': bulk_upload_job.github_org_github_id,
+    }
+    with app.app_context():
+        # actions of members of an org are approved like in the sync mode
+        g.user_data = _load_user_data(bulk_upload_job.user_github_id) or \
+            UserData(github_login=bulk_upload_job.username)
+        error = None
+        try:
+            with open(bulk_upload_job.file_path, 'rb') as uploaded_file:
+                for chunk in _iter_actions_chunks(iter_json_array_items(
+                        stream=uploaded_file,
+                        key='packageinfo',
+                )):
+                    created_count = failed_count = 0
+                    try:
+                        created_count = ingest_actions([
+                            prepare_bulk_upload_action(
+                                action=action,
+                                github_org=github_org,
+                            ) for action in chunk
+                        ])
+                    except Exception:
+                        logger.exception(
+                            'A chunk of bulk upload job "%s" is failed',
+                            job_id,
+                        )
+                        failed_count = len(chunk)
+                        observe_bulk_upload_failure(failed_count)
+                    with session_scope() as db_session:
+                        BulkUploadJob.add_progress(
+                            session=db_session,
+                            job_id=job_id,
+                            processed_count=len(chunk),
+                            created_count=created_count,
+                            failed_count=failed_count,
+                        )
+        except Exception as err:
+            logger.exception('Bulk upload job "%s" is failed', job_id)
+            error = str(err)
+        finally:
+            _remove_uploaded_file(bulk_upload_job.file_path)
+            with session_scope() as db_session:
+                BulkUploadJob.mark_finished(
+                    session=db_session,
+                    job_id=job_id,
+                    error=error,
+                )
+
+
+def run_bulk_upload_jobs(app: Flask) -> None:
+    """
+    Process pending bulk upload jobs one by one until there are none.
+    A job is claimed in the DB, so it's processed by one worker only
+    """
+    while True:
+        with app.app_context():
+            with session_scope() as db_session:
+                bulk_upload_job = BulkUploadJob.claim_pending(
+                    session=db_session,
+                )
+        if bulk_upload_job is None:
+            return
+        _run_bulk_upload_job(app=app, bulk_upload_job=bulk_upload_job)
+
+
+def check_bulk_upload_jobs(app: Flask) -> None:
+    """
+    Fail jobs of killed or restarted workers and process pending jobs
+    which weren't started by the workers that accepted them
+    """
+    with app.app_context():
+        with session_scope() as db_session:
+            files_paths = BulkUploadJob.fail_stale(
+                session=db_session,
+                timeout=BULK_UPLOAD_JOB_TIMEOUT,
+            )
+    for file_path in files_paths:
+        _remove_uploaded_file(file_path)
+    bulk_upload_executor.submit(run_bulk_upload_jobs, app=app)
+
+
+def start_bulk_upload_jobs_scheduler(
+        app: Flask,
+        interval: int,
+) -> threading.Thread:
+    """
+    Run `check_bulk_upload_jobs` in a daemon thread at start
+    and every `interval` seconds
+    """
+    def run():
+        while True:
+            try:
+                check_bulk_upload_jobs(app)
+            except Exception:
+                logger.exception('Check of bulk upload jobs is failed')
+            if stop_event.wait(interval):
+                return
+
+    stop_event = threading.Event()
+    thread = threading.Thread(
+        target=run,
+        name='bulk-upload-jobs',
+        daemon=True,
+    )
+    thread.stop_event = stop_event
+    thread.start()
+    return thread
+
+
+def start_bulk_upload_job(bulk_upload_form: BulkUpload) -> int:
+    """
+    Save an uploaded file and queue it for processing in background
+    :return: ID of the created bulk upload job
+    """
+    github_org = _get_bulk_upload_org(bulk_upload_form)
+    with tempfile.NamedTemporaryFile(
+        prefix='pes_bulk_upload_',
+        suffix='.json',
+        delete=False,
+    ) as uploaded_file:
+        shutil.copyfileobj(bulk_upload_form.uploaded_file.data, uploaded_file)
+    user_data = g.user_data  # type: UserData
+    with session_scope() as db_session:
+        job_id = BulkUploadJob.create(
+            session=db_session,
+            username=user_data.github_login,
+            user_github_id=user_data.github_id,
+            file_path=uploaded_file.name,
+            github_org=github_org,
+        ).id
+    bulk_upload_executor.submit(
+        run_bulk_upload_jobs,
+        app=current_app._get_current_object(),
+    )
+    return job_id
+
+
+def get_bulk_upload_job_handler(job_id: int) -> BulkUploadJobData:
+    """
+    A job is available to the user who uploaded its file only
+    """
+    with session_scope() as db_session:
+        bulk_upload_job = db_session.query(BulkUploadJob).filter_by(
+            id=job_id,
+            username=g.user_data.github_login,
+        ).one_or_none()
+        if bulk_upload_job is None:
+            raise DBRecordNotFound(
+                'Bulk upload job by ID "%s" is not found',
+                job_id,
+            )
+        return bulk_upload_job.to_dataclass()
 
 
 def dump_handler(
@@ -288,20 +698,23 @@ def dump_handler(
         organizations: list[int],
         groups: list[int],
         only_approved: bool,
-) -> TestResponse:
-    result = create_flask_client().get(
-        url_for('dump'),
-        data=json.dumps({
-            'oses': oses,
+) -> str:
+    validate_json_data(
+        json_data={
+            'oses': {str(key): value for key, value in oses.items()},
             'orgs': organizations,
             'groups': groups,
             'only_approved': only_approved,
-        }),
-        headers=list(request.headers),
-        content_type='application/json',
+        },
+        rule='/api/dump',
+        method='GET',
+    )
+    return get_cached_pes_json(
+        oses=oses,
+        organizations=organizations,
+        groups=groups,
+        only_approved=only_approved,
     )
-    raise_for_status(result)
-    return result
 
 
 def add_or_edit_group_of_actions_handler(
@@ -411,25 +824,15 @@ def add_or_edit_action_handler(
             'modulestream': module_data,
         })
     logger.warning(json_dict)
-    flask_client = create_flask_client()
-    if is_new:
-        http_method = flask_client.put
-    else:
-        http_method = flask_client.post
-    response = http_method(
-        url_for('actions'),
-        data=json.dumps(json_dict),
-        headers=list(request.headers),
-        content_type='application/json',
-    )
-    raise_for_status(response)
+    save_action(json_data=json_dict, is_new=is_new)
 
 
 def get_actions_handler(
-        page: int,
+        page: int | None,
         group_id: int,
         page_size: int = PAGE_SIZE,
-) -> tuple[list[ActionData], Page]:
+        cursor: str = None,
+) -> tuple[list[ActionData], Page | KeysetPage]:
     with session_scope() as db_session:
         pagination = Action.search_by_dataclass(
             action_data=ActionData(is_approved=None),
@@ -437,6 +840,8 @@ def get_actions_handler(
             page=page,
             page_size=page_size,
             group_id=group_id,
+            eager_load=True,
+            cursor=cursor,
         )
         actions = [action.to_dataclass() for action in pagination.items]
     for action in actions:
@@ -450,32 +855,24 @@ def get_actions_handler(
 def search_actions_handler(
         params: dict,
         group_id: int,
-        page: int,
+        page: int | None,
         page_size: int = PAGE_SIZE,
-) -> tuple[list[ActionData], Page]:
+        cursor: str = None,
+) -> tuple[list[ActionData], Page | KeysetPage]:
     with session_scope() as db_session:
-        package_name = params.get('package')
-        packages = db_session.query(Package).filter(
-            Package.name.like(f'%{package_name}%')
-        ).all()
-        query_actions_1 = db_session.query(Action).filter(
-            Action.in_package_set.any(
-                Package.id.in_(
-                    pkg.id for pkg in packages
-                )
-            )
+        actions_query, rank = Action.search_by_package(
+            session=db_session,
+            package_name=params.get('package', ''),
         )
-        query_actions_2 = db_session.query(Action).filter(
-            Action.out_package_set.any(
-                Package.id.in_(
-                    pkg.id for pkg in packages
-                )
-            )
+        pagination = paginate_query(
+            query=actions_query,
+            columns=[rank, Action.id],
+            page_size=page_size,
+            page=page,
+            cursor=cursor,
+            get_keys=lambda item: [item.rank, item.Action.id],
         )
-        total_query = query_actions_1.union(query_actions_2)
-        total_query = total_query.order_by(asc(Action.id))
-        pagination = paginate(total_query, page=page, page_size=page_size)
-        actions = [action.to_dataclass() for action in pagination.items]
+        actions = [item.Action.to_dataclass() for item in pagination.items]
     for action in actions:
         setattr(action, 'packages', list(zip_longest(
             action.in_package_set,
@@ -484,6 +881,35 @@ def search_actions_handler(
     return actions, pagination
 
 
+def structured_search_actions_handler(search_data: dict) -> dict:
+    """
+    Search actions by structured filters
+    :param search_data: filters, a cursor, a limit and fields of actions
+                        which are returned, see `search_actions` schema
+    """
+    fields = search_data.get('fields', ACTION_JSON_FIELDS)
+    if 'id' not in fields:
+        fields = ['id', *fields]
+    with session_scope() as db_session:
+        actions_query = Action.search_by_filters(
+            session=db_session,
+            filters=ActionFiltersData.create_from_json(search_data),
+        ).options(*Action.json_loading_options(fields))
+        pagination = paginate_by_keyset(
+            query=actions_query,
+            columns=[Action.id],
+            page_size=search_data.get('limit', SEARCH_ACTIONS_LIMIT),
+            cursor=search_data.get('cursor'),
+        )
+        return {
+            'actions': [
+                action.to_json(fields=fields) for action in pagination.items
+            ],
+            'next_cursor': pagination.next_cursor,
+            'previous_cursor': pagination.previous_cursor,
+        }
+
+
 def get_action_handler(action_id: int) -> ActionData | None:
     with session_scope() as db_session:
         actions = Action.search_by_dataclass(
@@ -512,14 +938,12 @@ def get_group_actions(
         only_approved: bool,
 ) -> list[ActionData]:
     with session_scope() as db_session:
-        group = db_session.query(Group).get(group_id)
-        return [action.to_dataclass() for action in group.actions
-        # TODO: refactor it to separate function with condition
-        # True True True - select only approved and non-approved will be rejected
-        # True False False - select only approved and non-approved will be rejected
-        # False False True - select any actions
-        # False True True - select any actions
-                if only_approved - action.is_approved <= 0]
+        actions_query = Action.search_for_dump(
+            session=db_session,
+            only_approved=only_approved,
+            groups_ids=[group_id],
+        )
+        return [action.to_dataclass() for action in actions_query]
 
 
 def approve_pull_request(data: dict[str, int]):
@@ -531,12 +955,14 @@ def approve_pull_request(data: dict[str, int]):
         action = actions[0]
         action.is_approved = True
         db_session.flush()
+        DatasetVersion.bump_version(session=db_session)
 
 
 def get_users_handler(
-        page: int,
+        page: int | None,
         page_size: int = PAGE_SIZE,
-) -> tuple[list[UserData], Page]:
+        cursor: str = None,
+) -> tuple[list[UserData], Page | KeysetPage]:
     with session_scope() as db_session:
         user_data = g.user_data  # type: UserData
         pagination = User.search_by_dataclass(
@@ -548,15 +974,17 @@ def get_users_handler(
             only_one=False,
             page_size=page_size,
             page=page,
+            cursor=cursor,
         )
         users = [user.to_dataclass() for user in pagination.items]
         return users, pagination
 
 
 def get_groups_of_actions_handler(
-        page: int,
+        page: int | None,
         page_size: int = PAGE_SIZE,
-) -> tuple[list[GroupActionsData], Page]:
+        cursor: str = None,
+) -> tuple[list[GroupActionsData], Page | KeysetPage]:
     with session_scope() as db_session:
         user_data = g.user_data  # type: UserData
         pagination = Group.search_by_github_orgs(
@@ -565,20 +993,22 @@ def get_groups_of_actions_handler(
             else user_data.github_orgs,
             page_size=page_size,
             page=page,
+            cursor=cursor,
         )
         groups = [group.to_dataclass() for group in pagination.items]
         return groups, pagination
 
 
 def get_history_handler(
-        page: int,
+        page: int | None,
         action_history_data: ActionHistoryData = ActionHistoryData(
             timestamp=None,
         ),
         action_id: int = None,
         username: str = None,
         page_size: int = PAGE_SIZE,
-) -> tuple[list[ActionHistoryData], Page]:
+        cursor: str = None,
+) -> tuple[list[ActionHistoryData], Page | KeysetPage]:
     with session_scope() as db_session:
         if action_id is not None:
             pagination = ActionHistory.get_history_by_action_id(
@@ -586,6 +1016,7 @@ def get_history_handler(
                 action_id=action_id,
                 page_size=page_size,
                 page=page,
+                cursor=cursor,
             )
         elif username is not None:
             pagination = ActionHistory.get_history_by_username(
@@ -593,6 +1024,7 @@ def get_history_handler(
                 username=username,
                 page_size=page_size,
                 page=page,
+                cursor=cursor,
             )
         else:
             pagination = ActionHistory.search_by_dataclass(
@@ -601,6 +1033,7 @@ def get_history_handler(
                 only_one=False,
                 page_size=page_size,
                 page=page,
+                cursor=cursor,
             )
         actions_history = [
             action_history.to_dataclass() for action_history
@@ -8,7 +8,7 @@ from flask import (
     Response,
     jsonify,
     make_response,
-    request, session, current_app, Flask,
+    request, session, Flask,
 )
 from flask import g
 from flask_api.status import (
@@ -18,13 +18,13 @@ from flask_api.status import (
 from flask_bs4 import Bootstrap
 from flask_github import GitHub, GitHubError
 from werkzeug.exceptions import InternalServerError
-from werkzeug.test import TestResponse
 
 from api.exceptions import (
     BaseCustomException,
     BadRequestFormatExceptioin,
-    CustomHTTPError,
 )
+from common.cache import LRUCache
+from common.json_validators import JSONValidatorsRegistry
 from common.sentry import get_logger
 from db.data_models import (
     GitHubOrgData,
@@ -33,10 +33,21 @@ from db.data_models import (
     MAIN_ORGANIZATION_ID,
 )
 from db.db_models import GitHubOrg, Group
-from db.json_schemas import json_schema_mapping
+from db.json_schemas import get_json_schema_mapping
 from db.utils import session_scope
 
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 1024))
+# seconds, it also limits how long other workers keep a stale user
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+
 logger = get_logger(__name__)
+# logged users by their GitHub ids
+user_cache = LRUCache(
+    max_size=USER_CACHE_SIZE,
+    ttl=USER_CACHE_TTL,
+    name='user',
+)
+json_validators = JSONValidatorsRegistry(get_json_schema_mapping)
 
 
 def jsonify_response(
@@ -61,6 +72,22 @@ def textify_response(
     return response
 
 
+def validate_json_data(json_data: Any, rule: str, method: str) -> None:
+    """
+    Validate passed data by JSON schema of a method of an API rule
+    """
+    validator = json_validators.get(rule=rule, method=method)
+    if validator is None:
+        return
+    try:
+        validator.validate(json_data)
+    except jsonschema.ValidationError as err:
+        raise BadRequestFormatExceptioin(
+            'Passed data is not valid JSON, because "%s"',
+            err,
+        )
+
+
 def validate_json(f):
     """
     Decorator: wrap success result
@@ -68,24 +95,20 @@ def validate_json(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        json_schema = json_schema_mapping.get(
-            request.url_rule.rule
-        ).get(request.method)
-        if json_schema is not None and not request.is_json:
+        validator = json_validators.get(
+            rule=request.url_rule.rule,
+            method=request.method,
+        )
+        if validator is not None and not request.is_json:
             raise BadRequestFormatExceptioin(
                 'Passed data is not JSON',
             )
-        elif json_schema is not None:
-            try:
-                jsonschema.validate(
-                    request.json,
-                    json_schema,
-                )
-            except jsonschema.ValidationError as err:
-                raise BadRequestFormatExceptioin(
-                    'Passed data is not valid JSON, because "%s"',
-                    err,
-                )
+        elif validator is not None:
+            validate_json_data(
+                json_data=request.json,
+                rule=request.url_rule.rule,
+                method=request.method,
+            )
         return f(*args, **kwargs)
 
     return decorated_function
@@ -202,6 +225,8 @@ def clear_sessions_fields_before_logout(f):
 
     @wraps(f)
     def decorated_function(*args, **kwargs):
+        if 'github_id' in session:
+            user_cache.delete(session['github_id'])
         for auth_field in auth_fields:
             session.pop(auth_field, None)
         return f(*args, **kwargs)
@@ -209,13 +234,6 @@ def clear_sessions_fields_before_logout(f):
     return decorated_function
 
 
-def create_flask_client():
-    app_client = current_app.test_client()
-    for key, value in request.cookies.items():
-        app_client.set_cookie('localhost', key, value)
-    return app_client
-
-
 def create_flask_application() -> Flask:
     app = Flask('pes')
     app.secret_key = os.environ['FLASK_SECRET_KEY']
@@ -229,33 +247,6 @@ def create_flask_application() -> Flask:
     return app
 
 
-def raise_for_status(response: TestResponse):
-    """
-        Raise for status of a response from Flask client
-    """
-
-    http_error_msg = ''
-    reason = response.data
-    if isinstance(reason, bytes):
-        # We attempt to decode utf-8 first because some servers
-        # choose to localize their reason strings. If the string
-        # isn't utf-8, we fall back to iso-8859-1 for all other
-        # encodings. (See PR #3538)
-        try:
-            reason = reason.decode('utf-8')
-        except UnicodeDecodeError:
-            reason = reason.decode('iso-8859-1')
-    else:
-        reason = reason
-
-    if 400 <= response.status_code < 500 or 500 <= response.status_code < 600:
-        raise CustomHTTPError(
-            reason=reason,
-            url=response.request.base_url,
-            status_code=response.status_code,
-        )
-
-
 def get_user_organizations(
         only_self: bool = False
 ) -> list[tuple[str, str]]:
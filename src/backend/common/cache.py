@@ -0,0 +1,80 @@
+# coding=utf-8
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import (
+    Any,
+    Hashable,
+)
+
+from common.metrics import observe_cache_request
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory LRU cache with an optional TTL of items.
+    The cache is local for a worker process
+    """
+
+    def __init__(
+            self,
+            max_size: int,
+            ttl: float | None = None,
+            name: str | None = None,
+    ):
+        """
+        :param max_size: max count of stored items
+        :param ttl: lifetime of an item in seconds, items don't expire if None
+        :param name: name of the cache in metrics, it isn't measured if None
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()  # type: OrderedDict[Hashable, tuple]
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._get(key)
+        if self.name is not None:
+            observe_cache_request(self.name, value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def _get(self, key: Hashable) -> Any:
+        with self._lock:
+            item = self._items.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires_at = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return _MISSING
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
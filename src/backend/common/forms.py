@@ -72,6 +72,10 @@ class BulkUpload(FlaskForm):
         ],
         choices=[]
     )
+    in_background = BooleanField(
+        'Process in background',
+        default=True,
+    )
 
 
 class DumpOsVersions(FlaskForm):
@@ -98,7 +102,6 @@ class Dump(FlaskForm):
 
     oses = FieldList(
         FormField(DumpOsVersions),
-        min_entries=len(get_major_version_list())
     )
     orgs = SelectMultipleField(
         'GitHub organizations',
@@ -113,6 +116,13 @@ class Dump(FlaskForm):
         default=True,
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # versions are taken from DB, so there isn't a count of entries
+        # when the form class is declared
+        for _ in range(len(self.oses), len(get_major_version_list())):
+            self.oses.append_entry()
+
 
 def release_version_validator(form, field: Field):
     if field.data == '' and field.name in (
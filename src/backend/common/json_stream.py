@@ -0,0 +1,128 @@
+# coding=utf-8
+from __future__ import annotations
+
+import codecs
+import json
+from typing import (
+    Any,
+    BinaryIO,
+    Iterator,
+)
+
+READ_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_whitespaces = ' \t\n\r'
+
+
+class JSONFieldNotFound(ValueError):
+    pass
+
+
+class _Reader:
+    """
+    Buffered reader of JSON tokens from a binary stream.
+    Only the unconsumed tail of a stream is kept in memory
+    """
+
+    def __init__(self, stream: BinaryIO, read_size: int):
+        self._stream = stream
+        self._read_size = read_size
+        self._text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._buffer = ''
+        self._position = 0
+        self._is_eof = False
+
+    def _read_more(self) -> bool:
+        if self._is_eof:
+            return False
+        data = self._stream.read(self._read_size)
+        self._is_eof = not data
+        self._buffer = self._buffer[self._position:] + \
+            self._text_decoder.decode(data, final=self._is_eof)
+        self._position = 0
+        return True
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(message, self._buffer, self._position)
+
+    def peek(self) -> str:
+        """
+        Skip whitespaces and return the next char without consuming it
+        """
+        while True:
+            while self._position < len(self._buffer) and \
+                    self._buffer[self._position] in _whitespaces:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read_more():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            raise self.error(f'Expecting one of "{chars}"')
+        self._position += 1
+        return char
+
+    def value(self) -> Any:
+        """
+        Decode the next JSON value.
+        A value which ends exactly at the end of the buffer may be truncated
+        (e.g. a number), so it's decoded again after reading more data
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._read_more():
+                    continue
+                raise
+            if end == len(self._buffer) and self._read_more():
+                continue
+            self._position = end
+            return value
+
+
+def iter_json_array_items(
+        stream: BinaryIO,
+        key: str,
+        read_size: int = READ_SIZE,
+) -> Iterator[Any]:
+    """
+    Iterate over items of an array from a field of the top-level JSON object
+    without loading the whole document in memory
+    :param stream: binary stream of a JSON document
+    :param key: name of the field with the array
+    :param read_size: size of a chunk which is read from the stream at once
+    """
+    reader = _Reader(stream=stream, read_size=read_size)
+    is_found = False
+    reader.expect('{')
+    if reader.peek() == '}':
+        raise JSONFieldNotFound(key)
+    while True:
+        if reader.peek() != '"':
+            raise reader.error('Expecting property name')
+        field_name = reader.value()
+        reader.expect(':')
+        if field_name == key and not is_found:
+            is_found = True
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield reader.value()
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            reader.value()
+        if reader.expect(',}') == '}':
+            break
+    if reader.peek():
+        raise reader.error('Extra data')
+    if not is_found:
+        raise JSONFieldNotFound(key)
@@ -0,0 +1,174 @@
+# coding=utf-8
+from __future__ import annotations
+
+import argparse
+import timeit
+from threading import Lock
+from typing import (
+    Any,
+    Callable,
+)
+
+import jsonschema
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+from common.sentry import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+
+class JSONValidator:
+    """
+    Validator of one JSON schema.
+    The schema is checked against its meta-schema only once.
+    A validator generated by `fastjsonschema` (if it's installed) is used
+    for valid data, `jsonschema` reports errors of invalid data,
+    so messages of errors don't depend on a used validator
+    """
+
+    def __init__(self, json_schema: dict, use_fast_validator: bool = True):
+        validator_class = jsonschema.validators.validator_for(json_schema)
+        validator_class.check_schema(json_schema)
+        self._validator = validator_class(json_schema)
+        self._fast_validate = None  # type: Callable[[Any], Any] | None
+        if use_fast_validator and fastjsonschema is not None:
+            try:
+                self._fast_validate = fastjsonschema.compile(json_schema)
+            except fastjsonschema.JsonSchemaDefinitionException as err:
+                logger.warning('Cannot compile JSON schema: %s', err)
+
+    def validate(self, json_data: Any) -> None:
+        """
+        :raise jsonschema.ValidationError: if data is invalid
+        """
+        if self._fast_validate is not None:
+            try:
+                self._fast_validate(json_data)
+                return
+            except fastjsonschema.JsonSchemaValueException:
+                pass
+        error = jsonschema.exceptions.best_match(
+            self._validator.iter_errors(json_data),
+        )
+        if error is not None:
+            raise error
+
+
+class JSONValidatorsRegistry:
+    """
+    Validators of JSON schemas of API rules and their methods.
+    A validator is built on first use and reused by following requests
+    """
+
+    def __init__(
+            self,
+            get_schemas: Callable[[], dict[str, dict[str, dict | None]]],
+            use_fast_validators: bool = True,
+    ):
+        """
+        :param get_schemas: function which returns mapping of rules
+                            to schemas of their methods
+        """
+        self._get_schemas = get_schemas
+        self._use_fast_validators = use_fast_validators
+        self._validators = {}  # type: dict[tuple[str, str], JSONValidator]
+        self._lock = Lock()
+
+    def get(self, rule: str, method: str) -> JSONValidator | None:
+        """
+        :return: validator or None if a method of a rule has no schema
+        """
+        key = (rule, method)
+        validator = self._validators.get(key, _MISSING)
+        if validator is not _MISSING:
+            return validator
+        with self._lock:
+            validator = self._validators.get(key, _MISSING)
+            if validator is _MISSING:
+                json_schema = self._get_schemas().get(rule, {}).get(method)
+                validator = None if json_schema is None else JSONValidator(
+                    json_schema=json_schema,
+                    use_fast_validator=self._use_fast_validators,
+                )
+                self._validators[key] = validator
+        return validator
+
+    def warm_up(self) -> None:
+        """
+        Build validators of all rules and their methods
+        """
+        for rule, methods in self._get_schemas().items():
+            for method in methods:
+                self.get(rule=rule, method=method)
+
+
+def _get_sample_action() -> dict:
+    package = {
+        'name': 'python3-requests',
+        'repository': 'appstream',
+        'modulestream': {'name': 'python39', 'stream': '3.9'},
+    }
+    return {
+        'action': 'replaced',
+        'org': {'name': 'AlmaLinux', 'github_id': 77327804},
+        'description': 'Sample action',
+        'in_packageset': {'package': [package]},
+        'out_packageset': {'package': [package, package]},
+        'initial_release': {
+            'os_name': 'CentOS',
+            'major_version': 7,
+            'minor_version': 9,
+        },
+        'release': {
+            'os_name': 'AlmaLinux',
+            'major_version': 8,
+            'minor_version': 5,
+        },
+        'architectures': ['x86_64', 'aarch64'],
+    }
+
+
+def benchmark(number: int) -> None:
+    """
+    Compare per-request cost of validation of an action of bulk import
+    """
+    from db.json_schemas import get_json_schema_mapping
+
+    json_schema = get_json_schema_mapping()['/api/actions']['PUT']
+    action = _get_sample_action()
+    validators = {
+        'jsonschema.validate': lambda data: jsonschema.validate(
+            data,
+            json_schema,
+        ),
+        'precompiled jsonschema': JSONValidator(
+            json_schema=json_schema,
+            use_fast_validator=False,
+        ).validate,
+    }
+    if fastjsonschema is not None:
+        validators['precompiled fastjsonschema'] = JSONValidator(
+            json_schema=json_schema,
+        ).validate
+    else:
+        print('fastjsonschema is not installed')
+    for name, validate in validators.items():
+        seconds = timeit.timeit(lambda: validate(action), number=number)
+        print(f'{name}: {seconds / number * 10 ** 6:.1f} us per request')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Micro-benchmark of validation of PUT /api/actions',
+    )
+    parser.add_argument(
+        '-n', '--number', type=int, default=1000, dest='number',
+        help='Count of validations of each validator',
+    )
+    benchmark(parser.parse_args().number)
@@ -0,0 +1,221 @@
+# coding=utf-8
+from __future__ import annotations
+
+import os
+import time
+
+from flask import (
+    Flask,
+    Response,
+    g,
+    request,
+)
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from db.db_engine import pool_metrics
+
+# metrics of gunicorn workers are shared through files of the directory,
+# it's read by prometheus_client itself. Files of a previous run are
+# removed by wsgi.ini.py before the app is imported
+PROMETHEUS_MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if PROMETHEUS_MULTIPROC_DIR is not None:
+    # metrics without labels open their files on creation
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+# endpoints which aren't measured
+SKIPPED_ENDPOINTS = (
+    'static',
+    'metrics',
+)
+
+REQUEST_DURATION = Histogram(
+    'pes_request_duration_seconds',
+    'Duration of a request before its response is returned',
+    ['endpoint', 'method'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 180,
+    ),
+)
+REQUESTS = Counter(
+    'pes_requests',
+    'Count of requests',
+    ['endpoint', 'method', 'status'],
+)
+REQUEST_BYTES = Counter(
+    'pes_request_bytes',
+    'Size of bodies of requests',
+    ['endpoint'],
+)
+RESPONSE_BYTES = Counter(
+    'pes_response_bytes',
+    'Size of bodies of responses which aren\'t streamed',
+    ['endpoint'],
+)
+DUMP_DURATION = Histogram(
+    'pes_dump_duration_seconds',
+    'Time of generation of a dump',
+    ['mode'],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 180),
+)
+DUMP_ACTIONS = Histogram(
+    'pes_dump_actions',
+    'Count of actions in a dump',
+    ['mode'],
+    buckets=(10, 100, 1000, 5000, 10000, 25000, 50000, 100000),
+)
+BULK_UPLOAD_ACTIONS = Counter(
+    'pes_bulk_upload_actions',
+    'Count of actions of bulk uploads',
+    ['result'],
+)
+BULK_UPLOAD_CHUNK_DURATION = Histogram(
+    'pes_bulk_upload_chunk_duration_seconds',
+    'Time of ingest of a chunk of a bulk upload',
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CACHE_REQUESTS = Counter(
+    'pes_cache_requests',
+    'Count of lookups in in-memory caches',
+    ['cache', 'result'],
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    'pes_db_pool_checkout_wait_seconds',
+    'Time of waiting for a connection from the pool',
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    'pes_db_pool_timeouts',
+    'Count of checkouts which failed to get a connection in time',
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    'pes_db_pool_checked_out',
+    'Count of connections which are in use',
+    multiprocess_mode='livesum',
+)
+DB_POOL_SIZE = Gauge(
+    'pes_db_pool_size',
+    'Count of connections which the pool keeps open at most',
+    multiprocess_mode='livesum',
+)
+DB_POOL_OVERFLOW = Gauge(
+    'pes_db_pool_overflow',
+    'Count of connections which are opened beyond the size of the pool',
+    multiprocess_mode='livesum',
+)
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop live gauges of an exited worker
+    """
+    if PROMETHEUS_MULTIPROC_DIR is not None:
+        multiprocess.mark_process_dead(pid)
+
+
+def observe_cache_request(cache_name: str, is_hit: bool) -> None:
+    CACHE_REQUESTS.labels(
+        cache=cache_name,
+        result='hit' if is_hit else 'miss',
+    ).inc()
+
+
+def observe_dump(mode: str, duration: float, actions_count: int) -> None:
+    DUMP_DURATION.labels(mode=mode).observe(duration)
+    DUMP_ACTIONS.labels(mode=mode).observe(actions_count)
+
+
+def observe_bulk_upload_chunk(
+        duration: float,
+        processed_count: int,
+        created_count: int,
+) -> None:
+    BULK_UPLOAD_CHUNK_DURATION.observe(duration)
+    BULK_UPLOAD_ACTIONS.labels(result='processed').inc(processed_count)
+    BULK_UPLOAD_ACTIONS.labels(result='created').inc(created_count)
+
+
+def observe_bulk_upload_failure(failed_count: int) -> None:
+    BULK_UPLOAD_ACTIONS.labels(result='failed').inc(failed_count)
+
+
+def _observe_pool_state(pool: QueuePool) -> None:
+    DB_POOL_SIZE.set(pool.size())
+    # it's negative while the pool isn't full
+    DB_POOL_OVERFLOW.set(max(pool.overflow(), 0))
+
+
+def _reset_pool_state(*args) -> None:
+    """
+    A preloading master disposes its pool before fork,
+    so the pool isn't added to sums of gauges of workers
+    """
+    DB_POOL_SIZE.set(0)
+    DB_POOL_OVERFLOW.set(0)
+
+
+def _start_request_timer() -> None:
+    g.request_started_at = time.perf_counter()
+
+
+def _observe_request(response: Response) -> Response:
+    started_at = g.pop('request_started_at', None)
+    endpoint = request.endpoint or 'unknown'
+    if started_at is None or endpoint in SKIPPED_ENDPOINTS:
+        return response
+    REQUEST_DURATION.labels(
+        endpoint=endpoint,
+        method=request.method,
+    ).observe(time.perf_counter() - started_at)
+    REQUESTS.labels(
+        endpoint=endpoint,
+        method=request.method,
+        status=response.status_code,
+    ).inc()
+    REQUEST_BYTES.labels(endpoint=endpoint).inc(request.content_length or 0)
+    if not response.is_streamed:
+        RESPONSE_BYTES.labels(endpoint=endpoint).inc(
+            response.calculate_content_length() or 0,
+        )
+    return response
+
+
+def get_metrics() -> Response:
+    """
+    Metrics of all workers in the text format of Prometheus
+    """
+    if PROMETHEUS_MULTIPROC_DIR is None:
+        registry = REGISTRY
+    else:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(
+        generate_latest(registry),
+        content_type=CONTENT_TYPE_LATEST,
+    )
+
+
+def init_metrics(app: Flask, engine: Engine) -> None:
+    """
+    Measure requests of an app and the pool of connections of an engine
+    """
+    app.before_request(_start_request_timer)
+    app.after_request(_observe_request)
+    pool_metrics.add_hook(DB_POOL_CHECKOUT_WAIT.observe)
+    pool_metrics.add_timeout_hook(DB_POOL_TIMEOUTS.inc)
+    pool_metrics.add_state_hook(_observe_pool_state)
+    event.listen(engine, 'engine_disposed', _reset_pool_state)
+    # the pool is updated after `checkin` is dispatched,
+    # so its own counters aren't used
+    event.listen(engine, 'checkout', lambda *args: DB_POOL_CHECKED_OUT.inc())
+    event.listen(engine, 'checkin', lambda *args: DB_POOL_CHECKED_OUT.dec())
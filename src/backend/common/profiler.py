@@ -0,0 +1,228 @@
+# coding=utf-8
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from threading import Lock
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+)
+
+from flask import Flask
+from werkzeug.exceptions import HTTPException
+
+from common.sentry import get_logger
+
+PROFILER_ENABLED = os.environ.get('PROFILER_ENABLED', 'False') == 'True'
+# a request is profiled if its header `X-Profile` is equal to the secret
+PROFILER_SECRET = os.environ.get('PROFILER_SECRET')
+# share of requests which are profiled without the header
+PROFILER_SAMPLING_RATE = float(os.environ.get('PROFILER_SAMPLING_RATE', 0))
+PROFILER_DIR = os.environ.get('PROFILER_DIR', '/tmp/pes_profiles')
+# the oldest profiles are removed over that count
+PROFILER_MAX_FILES = int(os.environ.get('PROFILER_MAX_FILES', 200))
+PROFILE_EXTENSION = '.prof'
+
+logger = get_logger(__name__)
+# only one profiler may be active in a process,
+# a request isn't profiled while another one is
+_profiler_lock = Lock()
+
+
+@dataclass
+class ProfileInfo:
+    name: str
+    endpoint: str
+    created_at: datetime
+    duration_ms: int
+
+
+def _get_profile_name(endpoint: str, duration: float) -> str:
+    return f'{int(time.time() * 1000)}_{int(duration * 1000)}_' \
+           f'{endpoint}{PROFILE_EXTENSION}'
+
+
+def _parse_profile_name(name: str) -> ProfileInfo:
+    timestamp, duration_ms, endpoint = name[:-len(PROFILE_EXTENSION)].split(
+        '_',
+        2,
+    )
+    return ProfileInfo(
+        name=name,
+        endpoint=endpoint,
+        created_at=datetime.fromtimestamp(int(timestamp) / 1000),
+        duration_ms=int(duration_ms),
+    )
+
+
+def list_profiles() -> dict[str, list[ProfileInfo]]:
+    """
+    :return: captured profiles by endpoints, the newest first
+    """
+    if not os.path.isdir(PROFILER_DIR):
+        return {}
+    result = defaultdict(list)
+    for name in sorted(os.listdir(PROFILER_DIR), reverse=True):
+        if not name.endswith(PROFILE_EXTENSION):
+            continue
+        try:
+            profile = _parse_profile_name(name)
+        except ValueError:
+            continue
+        result[profile.endpoint].append(profile)
+    return dict(sorted(result.items()))
+
+
+def get_profile_path(name: str) -> str | None:
+    """
+    :return: path of a captured profile or None if there isn't such profile
+    """
+    if not name.endswith(PROFILE_EXTENSION) or \
+            name != os.path.basename(name):
+        return
+    path = os.path.join(PROFILER_DIR, name)
+    if not os.path.isfile(path):
+        return
+    return path
+
+
+def get_profile_stats(path: str, limit: int = 50) -> str:
+    """
+    Render the slowest functions of a profile by cumulative time
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(path, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
+
+
+def _remove_old_profiles() -> None:
+    names = sorted(
+        name for name in os.listdir(PROFILER_DIR)
+        if name.endswith(PROFILE_EXTENSION)
+    )
+    for name in names[:max(len(names) - PROFILER_MAX_FILES, 0)]:
+        try:
+            os.remove(os.path.join(PROFILER_DIR, name))
+        except FileNotFoundError:
+            # it's removed by another worker
+            pass
+
+
+class _ProfiledResponse:
+    """
+    Body of a WSGI response which is generated under a profiler
+    """
+
+    def __init__(
+            self,
+            response: Iterable[bytes],
+            profile: cProfile.Profile,
+            on_close: Callable[[], None],
+    ):
+        self.response = response
+        self.profile = profile
+        self.on_close = on_close
+
+    def __iter__(self) -> Iterator[bytes]:
+        iterator = iter(self.response)
+        while True:
+            self.profile.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.profile.disable()
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            if hasattr(self.response, 'close'):
+                self.profile.enable()
+                try:
+                    self.response.close()
+                finally:
+                    self.profile.disable()
+        finally:
+            self.on_close()
+
+
+class ProfilerMiddleware:
+    """
+    WSGI middleware which profiles chosen requests by cProfile.
+    Generation of a streamed response is profiled too,
+    a profile is saved when the response is closed
+    """
+
+    def __init__(self, app: Flask, wsgi_app: Callable):
+        self.app = app
+        self.wsgi_app = wsgi_app
+
+    def _is_profiled(self, environ: dict) -> bool:
+        if PROFILER_SECRET and \
+                environ.get('HTTP_X_PROFILE') == PROFILER_SECRET:
+            return True
+        return random.random() < PROFILER_SAMPLING_RATE
+
+    def _get_endpoint(self, environ: dict) -> str:
+        try:
+            endpoint, _ = self.app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint = 'unknown'
+        return endpoint
+
+    def _save(self, profile: cProfile.Profile, endpoint: str, duration: float):
+        try:
+            os.makedirs(PROFILER_DIR, exist_ok=True)
+            profile.dump_stats(os.path.join(
+                PROFILER_DIR,
+                _get_profile_name(endpoint=endpoint, duration=duration),
+            ))
+            _remove_old_profiles()
+        except OSError as error:
+            logger.warning('Cannot save a profile of a request: %s', error)
+        finally:
+            _profiler_lock.release()
+
+    def __call__(self, environ: dict, start_response: Callable):
+        if not self._is_profiled(environ) or \
+                not _profiler_lock.acquire(blocking=False):
+            return self.wsgi_app(environ, start_response)
+        profile = cProfile.Profile()
+        started_at = time.perf_counter()
+        profile.enable()
+        try:
+            response = self.wsgi_app(environ, start_response)
+        except BaseException:
+            _profiler_lock.release()
+            raise
+        finally:
+            profile.disable()
+        endpoint = self._get_endpoint(environ)
+        return _ProfiledResponse(
+            response=response,
+            profile=profile,
+            on_close=lambda: self._save(
+                profile=profile,
+                endpoint=endpoint,
+                duration=time.perf_counter() - started_at,
+            ),
+        )
+
+
+def init_profiler(app: Flask) -> None:
+    """
+    Profile requests of an app if PROFILER_ENABLED is set
+    """
+    if PROFILER_ENABLED:
+        app.wsgi_app = ProfilerMiddleware(app=app, wsgi_app=app.wsgi_app)
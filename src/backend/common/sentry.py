@@ -4,10 +4,14 @@ from __future__ import annotations
 import requests
 import logging
 import os
+from threading import Thread
 
 import sentry_sdk
 from sentry_sdk.integrations.flask import FlaskIntegration
 
+# seconds, the metadata endpoint answers at once on an AWS instance
+AWS_METADATA_TIMEOUT = float(os.environ.get('AWS_METADATA_TIMEOUT', 1))
+
 
 def get_aws_instance_api() -> str:
     """
@@ -15,13 +19,18 @@ def get_aws_instance_api() -> str:
     """
     meta_data_url = 'http://169.254.169.254/latest/meta-data/public-ipv4'
     try:
-        req = requests.get(url=meta_data_url)
+        req = requests.get(url=meta_data_url, timeout=AWS_METADATA_TIMEOUT)
         req.raise_for_status()
         return req.text
     except (requests.ConnectionError, requests.RequestException):
         return 'ItIsNotAWSInstance'
 
 
+def _set_aws_instance_tag() -> None:
+    with sentry_sdk.Hub.main.configure_scope() as scope:
+        scope.set_tag('aws_instance_ip', get_aws_instance_api())
+
+
 def init_sentry_client(dsn: str | None = None) -> None:
     """
     Initialize sentry client with default options
@@ -44,8 +53,13 @@ def init_sentry_client(dsn: str | None = None) -> None:
         ],
     )
     if not os.getenv('SKIP_AWS_CHECKING'):
-        with sentry_sdk.configure_scope() as scope:
-            scope.set_tag('aws_instance_ip', get_aws_instance_api())
+        # the lookup doesn't block a start of an app,
+        # events before its end are sent without the tag
+        Thread(
+            target=_set_aws_instance_tag,
+            name='aws_instance_tag',
+            daemon=True,
+        ).start()
 
 
 def get_logger(logger_name: str):
@@ -0,0 +1,84 @@
+# coding=utf-8
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+
+# seconds, a cold import of the app by a gunicorn worker
+STARTUP_TIME_BUDGET = float(os.environ.get('STARTUP_TIME_BUDGET', 3))
+BACKEND_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_import_time(module: str) -> list[tuple[int, int, str]]:
+    """
+    Import a module in a new interpreter with `-X importtime`
+    :return: self and cumulative times (in microseconds) and names
+             of imported modules
+    """
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_PATH,
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(
+            f'Cannot import module "{module}":\n{process.stderr}',
+        )
+    result = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split(
+            '|',
+        )
+        result.append((int(self_time), int(cumulative_time), name.rstrip()))
+    return result
+
+
+def report(module: str, top: int, budget: float) -> bool:
+    """
+    Print the slowest imports of a module
+    :return: True if the module is imported within the budget
+    """
+    imports = measure_import_time(module)
+    total = next(
+        cumulative_time for _, cumulative_time, name in reversed(imports)
+        if name.strip() == module
+    )
+    print(f'{"self [us]":>10} | {"cumulative [us]":>15} | imported package')
+    for self_time, cumulative_time, name in sorted(
+            imports,
+            key=lambda item: item[1],
+            reverse=True,
+    )[:top]:
+        print(f'{self_time:>10} | {cumulative_time:>15} | {name}')
+    is_in_budget = total <= budget * 10 ** 6
+    print(
+        f'Import of "{module}" takes {total / 10 ** 6:.3f}s, '
+        f'budget is {budget:.3f}s: {"OK" if is_in_budget else "EXCEEDED"}',
+    )
+    return is_in_budget
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Report of time of a cold import of the app',
+    )
+    parser.add_argument(
+        '-m', '--module', default='main', dest='module',
+        help='Module which is imported by a worker',
+    )
+    parser.add_argument(
+        '-t', '--top', type=int, default=20, dest='top',
+        help='Count of the slowest imports in the report',
+    )
+    parser.add_argument(
+        '-b', '--budget', type=float, default=STARTUP_TIME_BUDGET,
+        dest='budget',
+        help='Max time of the import in seconds',
+    )
+    args = parser.parse_args()
+    sys.exit(0 if report(args.module, args.top, args.budget) else 1)
@@ -19,6 +19,21 @@ GLOBAL_ORGANIZATION = 'All'
 MAIN_ORGANIZATION = 'AlmaLinux'
 MAIN_ORGANIZATION_ID = '77327804'
 TIME_FORMAT_STRING = '%Y-%m-%d %H:%M:%S'
+# fields of an action which can be selected by the search API
+ACTION_JSON_FIELDS = (
+    'id',
+    'version',
+    'description',
+    'is_approved',
+    'action',
+    'org',
+    'initial_release',
+    'release',
+    'in_packageset',
+    'out_packageset',
+    'architectures',
+    'groups',
+)
 
 
 ReposMapping = {
@@ -146,6 +161,13 @@ class PackageType(enum.Enum):
     out_package = 'out'
 
 
+class BulkUploadJobStatus(enum.Enum):
+    pending = 'pending'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
 class ActionType(enum.Enum):
     present = 'present'
     removed = 'removed'
@@ -253,6 +275,36 @@ class ActionHistoryData(BaseData):
         return data_dict
 
 
+@dataclass
+class BulkUploadJobData(BaseData):
+
+    id: int = None
+    status: str = None
+    username: str = None
+    processed_count: int = 0
+    created_count: int = 0
+    failed_count: int = 0
+    error: str = None
+    created_at: str = None
+    started_at: str = None
+    finished_at: str = None
+    duration: float = None
+
+    @property
+    def throughput(self) -> float | None:
+        """
+        Count of processed actions per second
+        """
+        if not self.duration:
+            return
+        return round(self.processed_count / self.duration, 2)
+
+    def dump(self) -> dict:
+        result = asdict(self)
+        result['throughput'] = self.throughput
+        return result
+
+
 @dataclass
 class GitHubOrgData(BaseData):
     name: str = None
@@ -429,3 +481,54 @@ class ActionData(BaseData):
         del result['out_package_set']
         del result['groups']
         return result
+
+
+@dataclass
+class ActionFiltersData(BaseData):
+    """
+    Filters of the structured search of actions. Filters are combined
+    by AND, a list filter matches any of its values
+    """
+
+    package_name: str = None
+    repository: str = None
+    module_stream: ModuleStreamData = None
+    # `in`, `out` or `any` package set is matched by package filters
+    package_set: str = 'any'
+    source_release: ReleaseData = None
+    target_release: ReleaseData = None
+    actions: list[ActionType] = None
+    orgs: list[str] = None
+    arches: list[str] = None
+    is_approved: bool = None
+    groups_ids: list[int] = None
+
+    @staticmethod
+    def create_from_json(json_data: dict) -> ActionFiltersData:
+        module_stream = json_data.get('modulestream')
+        source_release = json_data.get('initial_release')
+        target_release = json_data.get('release')
+        actions = json_data.get('action')
+        return ActionFiltersData(
+            package_name=json_data.get('package'),
+            repository=json_data.get('repository'),
+            module_stream=None if module_stream is None else
+            ModuleStreamData.create_from_json(module_stream),
+            package_set=json_data.get('packageset', 'any'),
+            source_release=None if source_release is None else
+            ReleaseData.create_from_json(source_release),
+            target_release=None if target_release is None else
+            ReleaseData.create_from_json(target_release),
+            actions=None if actions is None else
+            [ActionType(action) for action in actions],
+            orgs=json_data.get('orgs'),
+            arches=json_data.get('architectures'),
+            is_approved=json_data.get('is_approved'),
+            groups_ids=json_data.get('groups'),
+        )
+
+    @property
+    def has_package_filters(self) -> bool:
+        return self.package_name is not None or \
+            self.repository is not None or \
+            self.module_stream is not None
@@ -6,9 +6,11 @@ import os
 from alembic.config import Config
 from db.db_engine import Engine
 from db.utils import (
+    collect_orphans,
     create_database_if_not_exists,
     make_migrations,
     migrate_db,
+    ORPHANS_GC_BATCH_SIZE,
 )
 
 if __name__ == '__main__':
@@ -46,6 +48,19 @@ if __name__ == '__main__':
         help='Revision to migrate (upgrade or downgrade) DB',
     )
 
+    collect_orphans_parser = subparsers.add_parser(
+        'collect_orphans',
+    )
+    collect_orphans_parser.add_argument(
+        '-b', '--batch-size', type=int, default=ORPHANS_GC_BATCH_SIZE,
+        dest='batch_size',
+        help='Count of rows of a table which are checked in one transaction',
+    )
+    collect_orphans_parser.add_argument(
+        '--all', action='store_true', dest='all_rows',
+        help='Check all rows instead of the ones detached since last run',
+    )
+
     args = parser.parse_args()
 
     dir_path = os.path.dirname(__file__)
@@ -61,5 +76,7 @@ if __name__ == '__main__':
         make_migrations(config, args.message, dir_path, args.revisions_path)
     elif args.command == 'migrate':
         migrate_db(config, args.revision)
+    elif args.command == 'collect_orphans':
+        collect_orphans(args.batch_size, args.all_rows)
     else:
         raise NotImplementedError
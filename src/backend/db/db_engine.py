@@ -1,24 +1,155 @@
 # coding=utf-8
+from __future__ import annotations
+
 import os
+import time
+from typing import Callable
 
-from sqlalchemy import create_engine
-from sqlalchemy.pool import SingletonThreadPool
+from sqlalchemy import (
+    create_engine,
+    event,
+    exc,
+)
+from sqlalchemy.engine import Engine as SQLAlchemyEngine
+from sqlalchemy.pool import QueuePool
 
-POSTGRES_CONNECTION_PATH = f'postgresql+psycopg2://' \
+POSTGRES_CONNECTION_PATH = os.environ.get('POSTGRES_DSN') or \
+                           f'postgresql+psycopg2://' \
                            f'{os.environ.get("POSTGRES_USER")}:' \
                            f'{os.environ.get("POSTGRES_PASSWORD")}@' \
                            f'{os.environ.get("POSTGRES_HOST")}/' \
                            f'{os.environ.get("POSTGRES_DB")}'
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+# seconds to wait for a free connection
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+# seconds, connections are reopened after that, -1 disables it
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True') == 'True'
+# milliseconds, 0 disables it
+DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 120000))
+DB_APPLICATION_NAME = os.environ.get('DB_APPLICATION_NAME', 'pes')
+
+
+class PoolMetrics:
+    """
+    Hooks which are called by checkouts of connections from the pool,
+    e.g. to export metrics of them
+    """
+
+    def __init__(self):
+        self._hooks = []  # type: list[Callable[[float], None]]
+        self._timeout_hooks = []  # type: list[Callable[[], None]]
+        self._state_hooks = []  # type: list[Callable[[QueuePool], None]]
+
+    def add_hook(self, hook: Callable[[float], None]) -> None:
+        """
+        Register a function which is called with wait time (in seconds)
+        of every checkout of a connection
+        """
+        self._hooks.append(hook)
+
+    def add_timeout_hook(self, hook: Callable[[], None]) -> None:
+        """
+        Register a function which is called when a checkout of a connection
+        is timed out
+        """
+        self._timeout_hooks.append(hook)
+
+    def add_state_hook(self, hook: Callable[[QueuePool], None]) -> None:
+        """
+        Register a function which is called with the pool after a connection
+        is taken from it or returned to it
+        """
+        self._state_hooks.append(hook)
+
+    def observe_checkout(self, wait_time: float) -> None:
+        for hook in self._hooks:
+            hook(wait_time)
+
+    def observe_timeout(self) -> None:
+        for hook in self._timeout_hooks:
+            hook()
+
+    def observe_state(self, pool: QueuePool) -> None:
+        for hook in self._state_hooks:
+            hook(pool)
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    Queue pool which measures how long a checkout waits for a connection
+    and reports its size and overflow when they may be changed
+    """
+
+    def _do_get(self):
+        started_at = time.monotonic()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.observe_timeout()
+            raise
+        finally:
+            pool_metrics.observe_state(self)
+        pool_metrics.observe_checkout(time.monotonic() - started_at)
+        return connection
+
+    def _do_return_conn(self, conn):
+        try:
+            super()._do_return_conn(conn)
+        finally:
+            pool_metrics.observe_state(self)
+
+
+def _remember_pid(dbapi_connection, connection_record) -> None:
+    connection_record.info['pid'] = os.getpid()
+
+
+def _check_pid(dbapi_connection, connection_record, connection_proxy) -> None:
+    """
+    Don't use a connection which is inherited from a parent process,
+    the pool opens a new one instead
+    """
+    if connection_record.info['pid'] != os.getpid():
+        connection_record.connection = connection_proxy.connection = None
+        raise exc.DisconnectionError(
+            'Connection record belongs to pid %s, '
+            'attempting to check out in pid %s' %
+            (connection_record.info['pid'], os.getpid())
+        )
 
 
 class Engine:
     __instance = None
 
     @classmethod
-    def get_instance(cls):
+    def get_instance(cls) -> SQLAlchemyEngine:
         if not cls.__instance:
+            options = f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
             cls.__instance = create_engine(
                 POSTGRES_CONNECTION_PATH,
-                pool_size=20,
+                poolclass=InstrumentedQueuePool,
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW,
+                pool_timeout=DB_POOL_TIMEOUT,
+                pool_recycle=DB_POOL_RECYCLE,
+                pool_pre_ping=DB_POOL_PRE_PING,
+                connect_args={
+                    'application_name': DB_APPLICATION_NAME,
+                    'options': options,
+                },
             )
+            event.listen(cls.__instance, 'connect', _remember_pid)
+            event.listen(cls.__instance, 'checkout', _check_pid)
         return cls.__instance
+
+    @classmethod
+    def dispose(cls) -> None:
+        """
+        Close connections of the pool, e.g. before a process is forked
+        """
+        if cls.__instance is not None:
+            cls.__instance.dispose()
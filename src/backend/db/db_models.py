@@ -1,15 +1,27 @@
 # coding=utf-8
 from __future__ import annotations
 
+import hashlib
 import json
+from datetime import (
+    datetime,
+    timedelta,
+)
+from typing import Iterable
 
 from flask import g
-from sqlalchemy_pagination import (
-    paginate,
-    Page,
+from sqlalchemy_pagination import Page
+from api.exceptions import (
+    BadRequestFormatExceptioin,
+    DBRecordNotFound,
+)
+from db.pagination import (
+    KeysetPage,
+    paginate_query,
 )
-from api.exceptions import DBRecordNotFound
 from db.data_models import (
+    ACTION_JSON_FIELDS,
+    ActionFiltersData,
     ActionType,
     ActionData,
     PackageData,
@@ -22,6 +34,8 @@ from db.data_models import (
     DataClassesJSONEncoder,
     TIME_FORMAT_STRING,
     GroupActionsData,
+    BulkUploadJobData,
+    BulkUploadJobStatus,
 )
 from sqlalchemy import (
     Column,
@@ -31,18 +45,40 @@ from sqlalchemy import (
     ForeignKey,
     Boolean,
     Enum,
-    null,
     DateTime,
     func,
     asc,
+    or_,
+    tuple_,
+    select,
+    UniqueConstraint,
+    Index,
+    DDL,
+    case,
+    delete,
+    event,
+    literal,
+    union,
+    update,
+)
+from sqlalchemy.dialects.postgresql import (
+    ARRAY,
+    array,
+    insert,
 )
-from sqlalchemy.exc import MultipleResultsFound
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql.expression import (
+    ColumnElement,
+    Select,
+)
 
 from sqlalchemy.orm import (
     relationship,
     Session,
     backref,
+    Query,
+    noload,
+    selectinload,
 )
 
 from common.sentry import (
@@ -54,6 +90,27 @@ logger = get_logger(__name__)
 Base = declarative_base()
 
 
+def insert_missing_rows(
+        session: Session,
+        model: type[Base],
+        rows: list[dict],
+) -> list[Base]:
+    """
+    Insert rows by one `INSERT ... ON CONFLICT DO NOTHING RETURNING`.
+    Rows which violate unique constraints (e.g. they are inserted
+    by a concurrent transaction) are skipped silently
+    :return: ORM objects of actually inserted rows
+    """
+    if not rows:
+        return []
+    statement = insert(model).values(rows).on_conflict_do_nothing().returning(
+        *model.__table__.columns,
+    )
+    return session.execute(
+        select(model).from_statement(statement),
+    ).scalars().all()
+
+
 users_github_orgs = Table(
     'users_github_orgs',
     Base.metadata,
@@ -62,12 +119,19 @@ users_github_orgs = Table(
             'users.id',
             ondelete='CASCADE',
         ),
+        primary_key=True,
     ),
     Column(
         'github_org_id', Integer, ForeignKey(
             'github_orgs.id',
             ondelete='CASCADE',
-        )
+        ),
+        primary_key=True,
+    ),
+    Index(
+        'users_github_orgs_github_org_id_user_id_idx',
+        'github_org_id',
+        'user_id',
     ),
 )
 
@@ -79,13 +143,16 @@ groups_actions = Table(
             'actions.id',
             ondelete='CASCADE',
         ),
+        primary_key=True,
     ),
     Column(
         'group_id', Integer, ForeignKey(
             'groups.id',
             ondelete='CASCADE',
         ),
+        primary_key=True,
     ),
+    Index('groups_actions_group_id_action_id_idx', 'group_id', 'action_id'),
 )
 
 
@@ -109,6 +176,9 @@ class Group(Base):
         passive_deletes=True,
         backref='groups_actions',
     )
+    __table_args__ = (
+        Index('groups_github_org_id_idx', 'github_org_id'),
+    )
     actions = relationship(
         'Action',
         secondary=groups_actions,
@@ -122,7 +192,8 @@ class Group(Base):
             github_orgs: list[GitHubOrgData],
             page_size: int = None,
             page: int = None,
-    ):
+            cursor: str = None,
+    ) -> list[Group] | Page | KeysetPage:
         query = session.query(Group)
         if github_orgs is not None:
             query = query.filter(
@@ -132,10 +203,16 @@ class Group(Base):
                     )
                 )
             )
-        if page is None or page_size is None:
+        if page_size is None:
             return query.all()
         else:
-            return paginate(query, page=page, page_size=page_size)
+            return paginate_query(
+                query=query,
+                columns=[Group.id],
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
 
     @staticmethod
     def search_by_dataclass(
@@ -201,6 +278,7 @@ class Group(Base):
             action_group.actions = actions
             session.add(action_group)
             session.flush()
+            DatasetVersion.bump_version(session=session)
         return action_group
 
     @staticmethod
@@ -222,6 +300,7 @@ class Group(Base):
         for key, value in group_actions_data.to_dict().items():
             setattr(group_actions, key, value)
         session.flush()
+        DatasetVersion.bump_version(session=session)
 
     @staticmethod
     def delete_by_dataclass(
@@ -231,6 +310,7 @@ class Group(Base):
         session.query(Group).filter_by(
             **group_actions_data.to_dict(force_included=['id']),
         ).delete()
+        DatasetVersion.bump_version(session=session)
 
 
 class GitHubOrg(Base):
@@ -239,6 +319,9 @@ class GitHubOrg(Base):
     id = Column(Integer, primary_key=True)
     github_id = Column(Integer, nullable=False)
     name = Column(String, nullable=False)
+    __table_args__ = (
+        Index('github_orgs_github_id_idx', 'github_id'),
+    )
 
     @staticmethod
     def search_by_dataclass(
@@ -286,6 +369,9 @@ class User(Base):
     github_access_token = Column(String)
     github_id = Column(Integer)
     github_login = Column(String)
+    __table_args__ = (
+        Index('users_github_id_idx', 'github_id'),
+    )
     github_orgs = relationship(
         'GitHubOrg',
         secondary=users_github_orgs,
@@ -300,7 +386,8 @@ class User(Base):
             only_one: bool,
             page_size: int = None,
             page: int = None,
-    ) -> list[User] | User | Page:
+            cursor: str = None,
+    ) -> list[User] | User | Page | KeysetPage:
         orgs = []
         if user_data.github_orgs is not None:
             orgs = [
@@ -321,13 +408,19 @@ class User(Base):
                     )
                 ),
             )
-        if page_size is None or page is None:
+        if page_size is None:
             if only_one:
                 return query.one_or_none()
             else:
                 return query.all()
         else:
-            return paginate(query, page=page, page_size=page_size)
+            return paginate_query(
+                query=query,
+                columns=[User.id],
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
 
     @staticmethod
     def create_from_dataclass(
@@ -374,6 +467,12 @@ class ActionHistory(Base):
     username = Column(String, nullable=False)
     action_id = Column(Integer, nullable=False)
     timestamp = Column(DateTime, nullable=False, onupdate=func.now())
+    __table_args__ = (
+        # keyset pagination of history
+        Index('actions_history_timestamp_id_idx', 'timestamp', 'id'),
+        Index('actions_history_action_id_idx', 'action_id'),
+        Index('actions_history_username_idx', 'username'),
+    )
 
     @staticmethod
     def search_by_dataclass(
@@ -382,18 +481,38 @@ class ActionHistory(Base):
             only_one: bool,
             page_size: int = None,
             page: int = None,
-    ) -> list[ActionHistory] | ActionHistory | Page:
+            cursor: str = None,
+    ) -> list[ActionHistory] | ActionHistory | Page | KeysetPage:
         query = session.query(ActionHistory).filter_by(
             **action_history_data.to_dict(),
         )
-        if page_size is None or page is None:
+        if page_size is None:
             if only_one:
                 return query.one_or_none()
             else:
                 return query.all()
         else:
-            result = paginate(query, page=page, page_size=page_size)
-        return result
+            return ActionHistory.paginate(
+                query=query,
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
+
+    @staticmethod
+    def paginate(
+            query: Query,
+            page_size: int,
+            page: int = None,
+            cursor: str = None,
+    ) -> Page | KeysetPage:
+        return paginate_query(
+            query=query,
+            columns=[ActionHistory.timestamp, ActionHistory.id],
+            page_size=page_size,
+            page=page,
+            cursor=cursor,
+        )
 
     @staticmethod
     def get_history_by_action_id(
@@ -401,12 +520,18 @@ class ActionHistory(Base):
             action_id: int,
             page_size: int = None,
             page: int = None,
-    ) -> list[ActionHistory] | Page:
+            cursor: str = None,
+    ) -> list[ActionHistory] | Page | KeysetPage:
         query = session.query(ActionHistory).filter_by(action_id=action_id)
-        if page_size is None or page is None:
+        if page_size is None:
             return query.all()
         else:
-            return paginate(query, page=page, page_size=page_size)
+            return ActionHistory.paginate(
+                query=query,
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
 
     @staticmethod
     def get_history_by_username(
@@ -414,12 +539,18 @@ class ActionHistory(Base):
             username: str,
             page_size: int = None,
             page: int = None,
-    ) -> list[ActionHistoryData] | Page:
+            cursor: str = None,
+    ) -> list[ActionHistory] | Page | KeysetPage:
         query = session.query(ActionHistory).filter_by(username=username)
-        if page_size is None or page is None:
+        if page_size is None:
             return query.all()
         else:
-            return paginate(query, page=page, page_size=page_size)
+            return ActionHistory.paginate(
+                query=query,
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
 
     @staticmethod
     def create_from_dataclass(
@@ -444,8 +575,187 @@ class ActionHistory(Base):
         )
 
 
+class DatasetVersion(Base):
+    """
+    Version of the whole dataset of actions.
+    It's increased by every change of actions or groups of actions,
+    so any derived data (e.g. cached dumps) can be invalidated
+    """
+    __tablename__ = 'dataset_versions'
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+
+    @staticmethod
+    def get_version(session: Session) -> int:
+        version = session.query(DatasetVersion.version).scalar()
+        return version or 0
+
+    @staticmethod
+    def bump_version(session: Session) -> None:
+        updated_rows = session.query(DatasetVersion).update(
+            {DatasetVersion.version: DatasetVersion.version + 1},
+            synchronize_session=False,
+        )
+        if not updated_rows:
+            session.add(DatasetVersion(version=1))
+        session.flush()
+
+
+class BulkUploadJob(Base):
+    """
+    State of a bulk upload which is processed in background.
+    Pending jobs are claimed by workers of the app through the table,
+    so a job isn't lost if a worker which accepted it is restarted
+    """
+    __tablename__ = 'bulk_upload_jobs'
+
+    id = Column(Integer, primary_key=True)
+    status = Column(
+        Enum(BulkUploadJobStatus),
+        nullable=False,
+        default=BulkUploadJobStatus.pending,
+    )
+    username = Column(String, nullable=False)
+    # the job ingests actions on behalf of that user
+    user_github_id = Column(Integer, nullable=True)
+    # uploaded file which is removed when the job is finished
+    file_path = Column(String, nullable=True)
+    github_org_name = Column(String, nullable=True)
+    github_org_github_id = Column(Integer, nullable=True)
+    processed_count = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    started_at = Column(DateTime, nullable=True)
+    # a running job updates it after every chunk
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    __table_args__ = (
+        Index('bulk_upload_jobs_status_id_idx', 'status', 'id'),
+    )
+
+    @staticmethod
+    def create(
+            session: Session,
+            username: str,
+            user_github_id: int,
+            file_path: str,
+            github_org: dict[str, str | int],
+    ) -> BulkUploadJob:
+        bulk_upload_job = BulkUploadJob(
+            username=username,
+            user_github_id=user_github_id,
+            file_path=file_path,
+            github_org_name=github_org['name'],
+            github_org_github_id=github_org['github_id'],
+        )
+        session.add(bulk_upload_job)
+        session.flush()
+        return bulk_upload_job
+
+    @staticmethod
+    def claim_pending(session: Session) -> BulkUploadJob | None:
+        """
+        Mark the oldest pending job as running.
+        Jobs locked by concurrent workers are skipped
+        :return: claimed job or None if there are no pending jobs
+        """
+        bulk_upload_job = session.query(BulkUploadJob).filter(
+            BulkUploadJob.status == BulkUploadJobStatus.pending,
+        ).order_by(asc(BulkUploadJob.id)).limit(1).with_for_update(
+            skip_locked=True,
+        ).one_or_none()  # type: BulkUploadJob
+        if bulk_upload_job is None:
+            return
+        bulk_upload_job.status = BulkUploadJobStatus.running
+        bulk_upload_job.started_at = datetime.now()
+        bulk_upload_job.heartbeat_at = bulk_upload_job.started_at
+        session.flush()
+        return bulk_upload_job
+
+    @staticmethod
+    def fail_stale(session: Session, timeout: int) -> list[str]:
+        """
+        Mark running jobs which haven't reported progress for `timeout`
+        seconds as failed, e.g. their worker was killed
+        :return: paths of uploaded files of the failed jobs
+        """
+        now = datetime.now()
+        return session.execute(update(BulkUploadJob).where(
+            BulkUploadJob.status == BulkUploadJobStatus.running,
+            BulkUploadJob.heartbeat_at < now - timedelta(seconds=timeout),
+        ).values({
+            BulkUploadJob.status: BulkUploadJobStatus.failed,
+            BulkUploadJob.error: 'The job is interrupted',
+            BulkUploadJob.finished_at: now,
+        }).returning(BulkUploadJob.file_path).execution_options(
+            synchronize_session=False,
+        )).scalars().all()
+
+    @staticmethod
+    def add_progress(
+            session: Session,
+            job_id: int,
+            processed_count: int,
+            created_count: int,
+            failed_count: int,
+    ) -> None:
+        session.query(BulkUploadJob).filter_by(id=job_id).update({
+            BulkUploadJob.processed_count:
+                BulkUploadJob.processed_count + processed_count,
+            BulkUploadJob.created_count:
+                BulkUploadJob.created_count + created_count,
+            BulkUploadJob.failed_count:
+                BulkUploadJob.failed_count + failed_count,
+            BulkUploadJob.heartbeat_at: datetime.now(),
+        }, synchronize_session=False)
+
+    @staticmethod
+    def mark_finished(
+            session: Session,
+            job_id: int,
+            error: str = None,
+    ) -> None:
+        session.query(BulkUploadJob).filter_by(id=job_id).update({
+            BulkUploadJob.status: BulkUploadJobStatus.done if error is None
+            else BulkUploadJobStatus.failed,
+            BulkUploadJob.error: error,
+            BulkUploadJob.finished_at: datetime.now(),
+        }, synchronize_session=False)
+
+    def to_dataclass(self) -> BulkUploadJobData:
+        def format_time(value: datetime | None) -> str | None:
+            if value is None:
+                return
+            return value.strftime(TIME_FORMAT_STRING)
+
+        duration = None
+        if self.started_at is not None:
+            duration = (
+                (self.finished_at or datetime.now()) - self.started_at
+            ).total_seconds()
+        return BulkUploadJobData(
+            id=self.id,
+            status=self.status.value,
+            username=self.username,
+            processed_count=self.processed_count,
+            created_count=self.created_count,
+            failed_count=self.failed_count,
+            error=self.error,
+            created_at=format_time(self.created_at),
+            started_at=format_time(self.started_at),
+            finished_at=format_time(self.finished_at),
+            duration=duration,
+        )
+
+
 class ModuleStream(Base):
     __tablename__ = 'modules_streams'
+    __table_args__ = (
+        UniqueConstraint('name', 'stream'),
+    )
 
     id = Column(Integer, nullable=False, primary_key=True)
     name = Column(String, nullable=False)
@@ -464,15 +774,58 @@ class ModuleStream(Base):
     ) -> ModuleStream | None:
         if module_stream_data.is_empty:
             return
-        module_stream = session.query(ModuleStream).filter_by(
-            **module_stream_data.to_dict(),
-        ).one_or_none()
-        if module_stream is None:
-            module_stream = ModuleStream(
-                **module_stream_data.to_dict(),
+        return ModuleStream.get_or_create_many(
+            modules_streams_data=[module_stream_data],
+            session=session,
+        )[ModuleStream.get_key(module_stream_data)]
+
+    @staticmethod
+    def get_key(module_stream_data: ModuleStreamData) -> tuple[str, str]:
+        return module_stream_data.name, module_stream_data.stream
+
+    @staticmethod
+    def get_or_create_many(
+            modules_streams_data: list[ModuleStreamData],
+            session: Session,
+    ) -> dict[tuple[str, str], ModuleStream]:
+        """
+        Get or create modules streams by a constant count of statements
+        :return: dict of modules streams by their natural keys
+        """
+        def select_modules_streams(
+                keys: set[tuple[str, str]],
+        ) -> dict[tuple[str, str], ModuleStream]:
+            return {
+                ModuleStream.get_key(module_stream): module_stream
+                for module_stream in session.query(ModuleStream).filter(
+                    tuple_(ModuleStream.name, ModuleStream.stream).in_(keys),
+                )
+            }
+
+        keys = {
+            ModuleStream.get_key(module_stream_data) for module_stream_data
+            in modules_streams_data if not module_stream_data.is_empty
+        }
+        if not keys:
+            return {}
+        result = select_modules_streams(keys)
+        missing_keys = keys - result.keys()
+        if missing_keys:
+            result.update(
+                (ModuleStream.get_key(module_stream), module_stream)
+                for module_stream in insert_missing_rows(
+                    session=session,
+                    model=ModuleStream,
+                    rows=[
+                        {'name': name, 'stream': stream}
+                        for name, stream in missing_keys
+                    ],
+                )
             )
-            session.add(module_stream)
-        return module_stream
+            missing_keys = keys - result.keys()
+        if missing_keys:
+            result.update(select_modules_streams(missing_keys))
+        return result
 
     @staticmethod
     def search_by_dataclass(
@@ -488,6 +841,9 @@ class ModuleStream(Base):
 
 class Release(Base):
     __tablename__ = 'releases'
+    __table_args__ = (
+        UniqueConstraint('os_name', 'major_version', 'minor_version'),
+    )
 
     id = Column(Integer, nullable=False, primary_key=True)
     os_name = Column(String, nullable=False)
@@ -508,15 +864,70 @@ class Release(Base):
     ) -> Release | None:
         if release_data.is_empty:
             return
-        release = session.query(Release).filter_by(
-            **release_data.to_dict(),
-        ).one_or_none()
-        if release is None:
-            release = Release(
-                **release_data.to_dict(),
+        return Release.get_or_create_many(
+            releases_data=[release_data],
+            session=session,
+        )[Release.get_key(release_data)]
+
+    @staticmethod
+    def get_key(release_data: ReleaseData) -> tuple[str, int, int]:
+        return (
+            release_data.os_name,
+            release_data.major_version,
+            release_data.minor_version,
+        )
+
+    @staticmethod
+    def get_or_create_many(
+            releases_data: list[ReleaseData],
+            session: Session,
+    ) -> dict[tuple[str, int, int], Release]:
+        """
+        Get or create releases by a constant count of statements
+        :return: dict of releases by their natural keys
+        """
+        def select_releases(
+                keys: set[tuple[str, int, int]],
+        ) -> dict[tuple[str, int, int], Release]:
+            return {
+                Release.get_key(release): release
+                for release in session.query(Release).filter(
+                    tuple_(
+                        Release.os_name,
+                        Release.major_version,
+                        Release.minor_version,
+                    ).in_(keys),
+                )
+            }
+
+        keys = {
+            Release.get_key(release_data) for release_data in releases_data
+            if release_data is not None and not release_data.is_empty
+        }
+        if not keys:
+            return {}
+        result = select_releases(keys)
+        missing_keys = keys - result.keys()
+        if missing_keys:
+            result.update(
+                (Release.get_key(release), release)
+                for release in insert_missing_rows(
+                    session=session,
+                    model=Release,
+                    rows=[
+                        {
+                            'os_name': os_name,
+                            'major_version': major_version,
+                            'minor_version': minor_version,
+                        } for os_name, major_version, minor_version
+                        in missing_keys
+                    ],
+                )
             )
-            session.add(release)
-        return release
+            missing_keys = keys - result.keys()
+        if missing_keys:
+            result.update(select_releases(missing_keys))
+        return result
 
     @staticmethod
     def search_by_dataclass(
@@ -538,12 +949,19 @@ actions_packages_out = Table(
             'actions.id',
             ondelete='CASCADE',
         ),
+        primary_key=True,
     ),
     Column(
         'package_id', Integer, ForeignKey(
             'packages.id',
             ondelete='CASCADE',
-        )
+        ),
+        primary_key=True,
+    ),
+    Index(
+        'actions_packages_out_package_id_action_id_idx',
+        'package_id',
+        'action_id',
     ),
 )
 
@@ -556,12 +974,19 @@ actions_packages_in = Table(
             'actions.id',
             ondelete='CASCADE',
         ),
+        primary_key=True,
     ),
     Column(
         'package_id', Integer, ForeignKey(
             'packages.id',
             ondelete='CASCADE',
-        )
+        ),
+        primary_key=True,
+    ),
+    Index(
+        'actions_packages_in_package_id_action_id_idx',
+        'package_id',
+        'action_id',
     ),
 )
 
@@ -583,6 +1008,32 @@ class Package(Base):
         passive_deletes=True,
         backref='packages',
     )
+    __table_args__ = (
+        # a package without a module stream is unique too
+        Index(
+            'packages_natural_key',
+            'name',
+            'repository',
+            'type',
+            func.coalesce(module_stream_id, 0),
+            unique=True,
+        ),
+        # substring search of packages
+        Index(
+            'packages_name_trgm_idx',
+            'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        Index(
+            'packages_repository_trgm_idx',
+            'repository',
+            postgresql_using='gin',
+            postgresql_ops={'repository': 'gin_trgm_ops'},
+        ),
+        Index('packages_repository_idx', 'repository'),
+        Index('packages_module_stream_id_idx', 'module_stream_id'),
+    )
 
     def to_dataclass(self) -> PackageData:
         return PackageData(
@@ -599,25 +1050,102 @@ class Package(Base):
             package_data: PackageData,
             session: Session,
     ) -> Package:
-        module_stream = ModuleStream.create_from_dataclass(
-            module_stream_data=package_data.module_stream,
+        return Package.get_or_create_many(
+            packages_data=[package_data],
             session=session,
+        )[Package.get_key(package_data)]
+
+    @staticmethod
+    def get_key(
+            package_data: PackageData,
+    ) -> tuple[str, str, PackageType, tuple[str, str] | None]:
+        module_stream_data = package_data.module_stream
+        if module_stream_data is None or module_stream_data.is_empty:
+            module_stream_key = None
+        else:
+            module_stream_key = ModuleStream.get_key(module_stream_data)
+        return (
+            package_data.name,
+            package_data.repository,
+            PackageType(package_data.type),
+            module_stream_key,
         )
-        package = session.query(Package).filter_by(
-            **package_data.to_dict(),
-        ).filter(
-            module_stream == module_stream or null(),
-        ).one_or_none()
-        if package is None:
-            package = Package(
-                **package_data.to_dict(),
+
+    @staticmethod
+    def get_or_create_many(
+            packages_data: list[PackageData],
+            session: Session,
+    ) -> dict[tuple[str, str, PackageType, tuple[str, str] | None], Package]:
+        """
+        Get or create packages and their modules streams
+        by a constant count of statements
+        :return: dict of packages by their natural keys
+        """
+        modules_streams = ModuleStream.get_or_create_many(
+            modules_streams_data=[
+                package_data.module_stream for package_data in packages_data
+                if package_data.module_stream is not None
+            ],
+            session=session,
+        )
+        modules_streams_keys = {
+            module_stream.id: key for key, module_stream
+            in modules_streams.items()
+        }
+
+        def get_package_key(
+                package: Package,
+        ) -> tuple[str, str, PackageType, tuple[str, str] | None]:
+            return (
+                package.name,
+                package.repository,
+                package.type,
+                modules_streams_keys.get(package.module_stream_id),
             )
-            if module_stream is not None:
-                package.module_stream = module_stream
-            session.add(package)
-        session.flush()
-        session.refresh(package)
-        return package
+
+        def select_packages(keys: set[tuple]) -> dict[tuple, Package]:
+            packages = {}
+            for package in session.query(Package).filter(
+                    Package.name.in_({key[0] for key in keys}),
+            ):
+                if package.module_stream_id is not None and \
+                        package.module_stream_id not in modules_streams_keys:
+                    continue
+                key = get_package_key(package)
+                if key in keys:
+                    packages[key] = package
+            return packages
+
+        keys = {
+            Package.get_key(package_data) for package_data in packages_data
+        }
+        if not keys:
+            return {}
+        result = select_packages(keys)
+        missing_keys = keys - result.keys()
+        if missing_keys:
+            new_packages = []
+            for name, repository, package_type, module_stream_key \
+                    in missing_keys:
+                module_stream = modules_streams.get(module_stream_key)
+                new_packages.append({
+                    'name': name,
+                    'repository': repository,
+                    'type': package_type,
+                    'module_stream_id': getattr(module_stream, 'id', None),
+                })
+            result.update(
+                (get_package_key(package), package)
+                for package in insert_missing_rows(
+                    session=session,
+                    model=Package,
+                    rows=new_packages,
+                )
+            )
+            missing_keys = keys - result.keys()
+        if missing_keys:
+            result.update(select_packages(missing_keys))
+        return result
 
     @staticmethod
     def search_by_dataclass(
@@ -641,6 +1169,16 @@ class Package(Base):
         return package_query.all()
 
 
+# trigram indexes of packages require the extension
+event.listen(
+    Package.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql',
+    ),
+)
+
+
 class Action(Base):
     __tablename__ = 'actions'
 
@@ -693,6 +1231,47 @@ class Action(Base):
         backref='actions_out',
     )
     arches = Column(String, nullable=False)
+    # see `Action.get_fingerprint`
+    fingerprint = Column(String, nullable=True, unique=True)
+    __table_args__ = (
+        # indexes of the structured search, see `Action.search_by_filters`
+        Index('actions_source_release_id_id_idx', 'source_release_id', 'id'),
+        Index('actions_target_release_id_id_idx', 'target_release_id', 'id'),
+        Index('actions_github_org_id_id_idx', 'github_org_id', 'id'),
+        Index('actions_action_id_idx', 'action', 'id'),
+        Index('actions_is_approved_id_idx', 'is_approved', 'id'),
+        Index(
+            'actions_arches_idx',
+            func.string_to_array(arches, ','),
+            postgresql_using='gin',
+        ),
+    )
+
+    @staticmethod
+    def get_fingerprint(
+            action_type: ActionType | str,
+            source_release_id: int | None,
+            target_release_id: int | None,
+            github_org_id: int | None,
+            in_packages_ids: list[int],
+            out_packages_ids: list[int],
+            arches: str | None,
+    ) -> str:
+        """
+        Canonical fingerprint of content of an action.
+        Releases, packages and orgs are unique by their natural keys,
+        so they are represented by their IDs
+        """
+        content = [
+            ActionType(action_type).name,
+            source_release_id,
+            target_release_id,
+            github_org_id,
+            sorted(set(in_packages_ids)),
+            sorted(set(out_packages_ids)),
+            sorted(set(arches.split(','))) if arches else [],
+        ]
+        return hashlib.sha256(json.dumps(content).encode()).hexdigest()
 
     @staticmethod
     def delete_action(
@@ -717,20 +1296,44 @@ class Action(Base):
                 action_id=action_before.id,
             ),
         )
+        OrphanCandidate.add_action_candidates(
+            session=session,
+            action=action_before,
+        )
         session.query(Action).filter(
             Action.id == action_data.id,
         ).delete(synchronize_session='fetch')
-        session.query(Release).filter(
-            ~Release.actions_target.any(),
-            ~Release.actions_source.any(),
-        ).delete(synchronize_session='fetch')
-        session.query(Package).filter(
-            ~Package.actions_in.any(),
-            ~Package.actions_out.any(),
-        ).delete(synchronize_session='fetch')
-        session.query(ModuleStream).filter(
-            ~ModuleStream.packages.any(),
-        ).delete(synchronize_session='fetch')
+        DatasetVersion.bump_version(session=session)
+
+    @staticmethod
+    def eager_loading_options(with_groups: bool = True) -> tuple:
+        """
+        Loader options which fetch everything that `Action.to_dataclass`
+        touches in a constant count of queries instead of lazy loading
+        of relations per an action.
+        Groups aren't loaded at all if `with_groups` is False,
+        so `groups` of such actions are empty
+        """
+        if with_groups:
+            groups_loader = selectinload(Action.groups)
+            groups_options = (
+                groups_loader.selectinload(Group.github_org),
+                groups_loader.selectinload(Group.actions),
+            )
+        else:
+            groups_options = (noload(Action.groups),)
+        return (
+            selectinload(Action.source_release),
+            selectinload(Action.target_release),
+            selectinload(Action.github_org_rel),
+            selectinload(Action.in_package_set).selectinload(
+                Package.module_stream,
+            ),
+            selectinload(Action.out_package_set).selectinload(
+                Package.module_stream,
+            ),
+            *groups_options,
+        )
 
     def to_dataclass(self) -> ActionData:
         return ActionData(
@@ -758,14 +1361,19 @@ class Action(Base):
             action_data: ActionData,
             session: Session,
     ) -> None:
-        in_package_set = [Package.create_from_dataclass(
-            package_data=in_package,
+        packages = Package.get_or_create_many(
+            packages_data=action_data.in_package_set +
+            action_data.out_package_set,
             session=session,
-        ) for in_package in action_data.in_package_set]
-        out_package_set = [Package.create_from_dataclass(
-            package_data=out_package,
-            session=session,
-        ) for out_package in action_data.out_package_set]
+        )
+        in_package_set = [
+            packages[Package.get_key(in_package)]
+            for in_package in action_data.in_package_set
+        ]
+        out_package_set = [
+            packages[Package.get_key(out_package)]
+            for out_package in action_data.out_package_set
+        ]
         source_release = Release.create_from_dataclass(
             release_data=action_data.source_release,
             session=session,
@@ -779,12 +1387,31 @@ class Action(Base):
             github_org_data=action_data.github_org,
         )
         action = session.query(Action).get(action_data.id)
-        action_before = action.to_dataclass()
         if action is None:
             raise DBRecordNotFound(
                 'Action by ID "%s" is not found',
                 action_data.id,
             )
+        action_before = action.to_dataclass()
+        OrphanCandidate.add_action_candidates(session=session, action=action)
+        fingerprint = Action.get_fingerprint(
+            action_type=action_data.action,
+            source_release_id=getattr(source_release, 'id', None),
+            target_release_id=getattr(target_release, 'id', None),
+            github_org_id=github_org.id,
+            in_packages_ids=[pkg.id for pkg in in_package_set],
+            out_packages_ids=[pkg.id for pkg in out_package_set],
+            arches=action_data.to_dict().get('arches'),
+        )
+        duplicate_id = session.query(Action.id).filter(
+            Action.fingerprint == fingerprint,
+            Action.id != action.id,
+        ).scalar()
+        if duplicate_id is not None:
+            raise BadRequestFormatExceptioin(
+                'Action with the same content already exists: %s',
+                duplicate_id,
+            )
         for key, value in action_data.to_dict().items():
             setattr(action, key, value)
         action.source_release = source_release
@@ -792,22 +1419,10 @@ class Action(Base):
         action.in_package_set = in_package_set
         action.out_package_set = out_package_set
         action.github_org_rel = github_org
+        action.fingerprint = fingerprint
         action.version += 1
         session.flush()
         session.refresh(action)
-        session.query(Release).filter(
-            ~Release.actions_target.any(),
-            ~Release.actions_source.any(),
-        ).delete(synchronize_session='fetch')
-        session.query(Package).filter(
-            ~Package.actions_in.any(),
-            ~Package.actions_out.any(),
-        ).delete(synchronize_session='fetch')
-        session.query(ModuleStream).filter(
-            ~ModuleStream.packages.any(),
-        ).delete(synchronize_session='fetch')
-        session.flush()
-        session.refresh(action)
         user_data = g.user_data  # type: User
         ActionHistory.create_from_dataclass(
             session=session,
@@ -829,20 +1444,26 @@ class Action(Base):
                 action_id=action.id,
             ),
         )
+        DatasetVersion.bump_version(session=session)
 
     @staticmethod
     def create_from_dataclass(
             action_data: ActionData,
             session: Session,
     ) -> Action:
-        in_package_set = [Package.create_from_dataclass(
-            package_data=in_package,
-            session=session,
-        ) for in_package in action_data.in_package_set]
-        out_package_set = [Package.create_from_dataclass(
-            package_data=out_package,
+        packages = Package.get_or_create_many(
+            packages_data=action_data.in_package_set +
+            action_data.out_package_set,
             session=session,
-        ) for out_package in action_data.out_package_set]
+        )
+        in_package_set = [
+            packages[Package.get_key(in_package)]
+            for in_package in action_data.in_package_set
+        ]
+        out_package_set = [
+            packages[Package.get_key(out_package)]
+            for out_package in action_data.out_package_set
+        ]
         source_release = Release.create_from_dataclass(
             release_data=action_data.source_release,
             session=session,
@@ -855,27 +1476,28 @@ class Action(Base):
             session=session,
             github_org_data=action_data.github_org,
         )
-        actions = Action.search_by_dataclass(action_data=action_data,
-                                             session=session)
-        actions = [
-            action for action in actions if
-            len(action.in_package_set) == len(in_package_set) and
-            len(action.out_package_set) == len(out_package_set)
-        ]
-        if len(actions) > 1:
-            raise MultipleResultsFound()
-        elif not len(actions):
-            action = None
-        else:
-            action = actions[0]
+        action_dict = action_data.to_dict()
+        fingerprint = Action.get_fingerprint(
+            action_type=action_dict['action'],
+            source_release_id=getattr(source_release, 'id', None),
+            target_release_id=getattr(target_release, 'id', None),
+            github_org_id=github_org.id,
+            in_packages_ids=[pkg.id for pkg in in_package_set],
+            out_packages_ids=[pkg.id for pkg in out_package_set],
+            arches=action_dict.get('arches'),
+        )
+        action = session.query(Action).filter_by(
+            fingerprint=fingerprint,
+        ).one_or_none()
         if action is None:
             action = Action(
-                **action_data.to_dict(),
+                **action_dict,
                 source_release=source_release,
                 target_release=target_release,
                 in_package_set=in_package_set,
                 out_package_set=out_package_set,
                 github_org_rel=github_org,
+                fingerprint=fingerprint,
             )
             session.add(action)
             session.flush()
@@ -895,8 +1517,124 @@ class Action(Base):
                     action_id=action.id,
                 ),
             )
+            DatasetVersion.bump_version(session=session)
         return action
 
+    @staticmethod
+    def bulk_create_from_dataclasses(
+            actions_data: list[ActionData],
+            session: Session,
+    ) -> list[Action]:
+        """
+        Create a batch of actions with their history.
+        Releases, packages, modules streams and orgs are resolved for
+        the whole batch at once and the actions, association rows and
+        history rows are inserted in bulk.
+        Actions which are already present in DB are skipped
+        :return: list of created actions
+        """
+        if not actions_data:
+            return []
+        releases = Release.get_or_create_many(
+            releases_data=[
+                release_data for action_data in actions_data
+                for release_data in (
+                    action_data.source_release,
+                    action_data.target_release,
+                )
+            ],
+            session=session,
+        )
+        packages = Package.get_or_create_many(
+            packages_data=[
+                package_data for action_data in actions_data
+                for package_data in
+                action_data.in_package_set + action_data.out_package_set
+            ],
+            session=session,
+        )
+        github_orgs = {}
+        for action_data in actions_data:
+            org_key = (action_data.github_org.name,
+                       action_data.github_org.github_id)
+            if org_key not in github_orgs:
+                github_orgs[org_key] = GitHubOrg.create_from_dataclass(
+                    session=session,
+                    github_org_data=action_data.github_org,
+                )
+
+        def get_release(release_data: ReleaseData | None) -> Release | None:
+            if release_data is None or release_data.is_empty:
+                return
+            return releases[Release.get_key(release_data)]
+
+        new_actions = {}
+        for action_data in actions_data:
+            source_release = get_release(action_data.source_release)
+            target_release = get_release(action_data.target_release)
+            github_org = github_orgs[(
+                action_data.github_org.name,
+                action_data.github_org.github_id,
+            )]
+            in_package_set = [
+                packages[Package.get_key(package_data)]
+                for package_data in action_data.in_package_set
+            ]
+            out_package_set = [
+                packages[Package.get_key(package_data)]
+                for package_data in action_data.out_package_set
+            ]
+            action_dict = action_data.to_dict()
+            action_dict['action'] = ActionType(action_dict['action'])
+            fingerprint = Action.get_fingerprint(
+                action_type=action_dict['action'],
+                source_release_id=getattr(source_release, 'id', None),
+                target_release_id=getattr(target_release, 'id', None),
+                github_org_id=github_org.id,
+                in_packages_ids=[pkg.id for pkg in in_package_set],
+                out_packages_ids=[pkg.id for pkg in out_package_set],
+                arches=action_dict.get('arches'),
+            )
+            # an action is built only when it's known to be new,
+            # otherwise it'd be added to the session by backrefs
+            new_actions.setdefault(fingerprint, dict(
+                **action_dict,
+                source_release=source_release,
+                target_release=target_release,
+                in_package_set=in_package_set,
+                out_package_set=out_package_set,
+                github_org_rel=github_org,
+                groups=[],
+                fingerprint=fingerprint,
+            ))
+        for fingerprint, in session.query(Action.fingerprint).filter(
+                Action.fingerprint.in_(new_actions.keys()),
+        ):
+            del new_actions[fingerprint]
+        new_actions = [
+            Action(**action_kwargs) for action_kwargs in new_actions.values()
+        ]
+        if not new_actions:
+            return []
+        session.add_all(new_actions)
+        session.flush()
+        user_data = g.user_data  # type: UserData
+        session.bulk_insert_mappings(ActionHistory, [
+            ActionHistoryData(
+                action_after=json.dumps(
+                    action.to_dataclass(),
+                    cls=DataClassesJSONEncoder,
+                    indent=4,
+                    sort_keys=True,
+                ),
+                history_type='create',
+                username=user_data.github_login,
+                action_id=action.id,
+            ).to_dict() for action in new_actions
+        ])
+        DatasetVersion.bump_version(session=session)
+        return new_actions
+
     @staticmethod
     def search_by_dataclass(
             action_data: ActionData,
@@ -905,7 +1643,9 @@ class Action(Base):
             page_size: int = None,
             page: int = None,
             group_id: int = None,
-    ) -> list[Action] | Page | Action | None:
+            eager_load: bool = False,
+            cursor: str = None,
+    ) -> list[Action] | Page | KeysetPage | Action | None:
         if action_data.is_empty:
             return
         in_package_set = []
@@ -980,12 +1720,378 @@ class Action(Base):
                     Group.id.in_([group_id])
                 )
             )
-        action_query = action_query.order_by(asc(Action.id))
-        if page_size is None or page is None:
+        if eager_load:
+            action_query = action_query.options(
+                *Action.eager_loading_options(),
+            )
+        if page_size is None:
+            action_query = action_query.order_by(asc(Action.id))
             if only_one:
                 result = action_query.one_or_none()
             else:
                 result = action_query.all()
         else:
-            result = paginate(action_query, page=page, page_size=page_size)
+            result = paginate_query(
+                query=action_query,
+                columns=[Action.id],
+                page_size=page_size,
+                page=page,
+                cursor=cursor,
+            )
         return result
+
+    @staticmethod
+    def search_by_package(
+            session: Session,
+            package_name: str,
+    ) -> tuple[Query, ColumnElement]:
+        """
+        Build a query of actions which have a package with a name
+        or a repository containing a passed substring.
+        Matching packages are found by trigram indexes
+        :return: query of pairs of an action and its rank and the rank
+                 expression. Lower rank is more relevant: 0 - name of
+                 a package is equal to the substring, 1 - it starts with
+                 the substring, 2 - it contains the substring,
+                 3 - only a repository contains the substring
+        """
+        is_matched = or_(
+            Package.name.contains(package_name, autoescape=True),
+            Package.repository.contains(package_name, autoescape=True),
+        )
+        package_rank = case(
+            (Package.name == package_name, 0),
+            (Package.name.startswith(package_name, autoescape=True), 1),
+            (Package.name.contains(package_name, autoescape=True), 2),
+            else_=3,
+        )
+
+        def select_matched(packages_table: Table, *columns) -> Select:
+            return select(*columns).select_from(packages_table.join(
+                Package,
+                Package.id == packages_table.c.package_id,
+            )).where(is_matched)
+
+        def get_best_rank(packages_table: Table) -> ColumnElement:
+            return select_matched(
+                packages_table,
+                func.min(package_rank),
+            ).where(
+                packages_table.c.action_id == Action.id,
+            ).scalar_subquery()
+
+        rank = func.least(
+            get_best_rank(actions_packages_in),
+            get_best_rank(actions_packages_out),
+            type_=Integer,
+        )
+        actions_query = session.query(Action, rank.label('rank')).filter(
+            Action.id.in_(union(
+                select_matched(
+                    actions_packages_in,
+                    actions_packages_in.c.action_id,
+                ),
+                select_matched(
+                    actions_packages_out,
+                    actions_packages_out.c.action_id,
+                ),
+            )),
+        ).options(*Action.eager_loading_options())
+        return actions_query, rank
+
+    @staticmethod
+    def search_by_filters(
+            session: Session,
+            filters: ActionFiltersData,
+    ) -> Query:
+        """
+        Build a query of actions which match all passed filters.
+        Every filter is a condition on a column of actions or a subquery
+        of IDs, so the whole search is one SQL query
+        """
+        conditions = []
+        if filters.has_package_filters:
+            packages_conditions = []
+            if filters.package_name is not None:
+                packages_conditions.append(
+                    Package.name == filters.package_name,
+                )
+            if filters.repository is not None:
+                packages_conditions.append(
+                    Package.repository == filters.repository,
+                )
+            if filters.module_stream is not None:
+                packages_conditions.append(Package.module_stream_id.in_(
+                    select(ModuleStream.id).filter_by(
+                        **filters.module_stream.to_dict(),
+                    ),
+                ))
+            packages_tables = {
+                'in': [actions_packages_in],
+                'out': [actions_packages_out],
+                'any': [actions_packages_in, actions_packages_out],
+            }[filters.package_set]
+            actions_ids = [
+                select(packages_table.c.action_id).join(
+                    Package,
+                    Package.id == packages_table.c.package_id,
+                ).where(*packages_conditions)
+                for packages_table in packages_tables
+            ]
+            conditions.append(Action.id.in_(
+                union(*actions_ids) if len(actions_ids) > 1
+                else actions_ids[0],
+            ))
+        if filters.source_release is not None:
+            conditions.append(Action.source_release_id.in_(
+                select(Release.id).filter_by(
+                    **filters.source_release.to_dict(),
+                ),
+            ))
+        if filters.target_release is not None:
+            conditions.append(Action.target_release_id.in_(
+                select(Release.id).filter_by(
+                    **filters.target_release.to_dict(),
+                ),
+            ))
+        if filters.actions is not None:
+            conditions.append(Action.action.in_(filters.actions))
+        if filters.orgs is not None:
+            conditions.append(Action.github_org_id.in_(
+                select(GitHubOrg.id).where(GitHubOrg.name.in_(filters.orgs)),
+            ))
+        if filters.arches is not None:
+            conditions.append(Action.get_arches_array().overlap(
+                array(filters.arches),
+            ))
+        if filters.is_approved is not None:
+            conditions.append(Action.is_approved.is_(filters.is_approved))
+        if filters.groups_ids is not None:
+            conditions.append(Action.id.in_(
+                select(groups_actions.c.action_id).where(
+                    groups_actions.c.group_id.in_(filters.groups_ids),
+                ),
+            ))
+        return session.query(Action).filter(*conditions)
+
+    @staticmethod
+    def get_arches_array() -> ColumnElement:
+        """
+        Arches of an action are stored as a comma separated string
+        """
+        return func.string_to_array(Action.arches, ',', type_=ARRAY(String))
+
+    @staticmethod
+    def json_loading_options(fields: Iterable[str]) -> list:
+        """
+        Loader options of relations which are required
+        for passed fields of `Action.to_json`
+        """
+        loaders = {
+            'org': selectinload(Action.github_org_rel),
+            'initial_release': selectinload(Action.source_release),
+            'release': selectinload(Action.target_release),
+            'in_packageset': selectinload(Action.in_package_set).selectinload(
+                Package.module_stream,
+            ),
+            'out_packageset': selectinload(
+                Action.out_package_set,
+            ).selectinload(Package.module_stream),
+            'groups': selectinload(Action.groups),
+        }
+        return [loaders[field] for field in fields if field in loaders]
+
+    def to_json(self, fields: Iterable[str] = ACTION_JSON_FIELDS) -> dict:
+        """
+        Dump an action in the format of the actions API
+        :param fields: fields of an action which are included in a result
+        """
+        def dump_release(release: Release | None) -> dict | None:
+            if release is None:
+                return
+            return {
+                'os_name': release.os_name,
+                'major_version': release.major_version,
+                'minor_version': release.minor_version,
+            }
+
+        def dump_packages(packages: list[Package]) -> dict:
+            return {'package': [
+                {
+                    'name': package.name,
+                    'repository': package.repository,
+                    'modulestream': None if package.module_stream is None
+                    else {
+                        'name': package.module_stream.name,
+                        'stream': package.module_stream.stream,
+                    },
+                } for package in packages
+            ]}
+
+        getters = {
+            'id': lambda: self.id,
+            'version': lambda: self.version,
+            'description': lambda: self.description,
+            'is_approved': lambda: self.is_approved,
+            'action': lambda: self.action.value,
+            'org': lambda: None if self.github_org_rel is None else {
+                'name': self.github_org_rel.name,
+                'github_id': self.github_org_rel.github_id,
+            },
+            'initial_release': lambda: dump_release(self.source_release),
+            'release': lambda: dump_release(self.target_release),
+            'in_packageset': lambda: dump_packages(self.in_package_set),
+            'out_packageset': lambda: dump_packages(self.out_package_set),
+            'architectures': lambda: self.arches.split(','),
+            'groups': lambda: [
+                {'id': group.id, 'name': group.name} for group in self.groups
+            ],
+        }
+        return {field: getters[field]() for field in fields}
+
+    @staticmethod
+    def search_for_dump(
+            session: Session,
+            only_approved: bool,
+            github_orgs_ids: list[int] = None,
+            groups_ids: list[int] = None,
+    ) -> Query:
+        """
+        Build a query of actions for a PES dump ordered by ID.
+        An action is selected if it belongs to any of passed GitHub orgs
+        or to any of passed groups. All actions are selected
+        if neither orgs nor groups are passed.
+        A dump doesn't contain groups of actions, so they aren't loaded
+        and `groups` of selected actions are empty
+        """
+        action_query = session.query(Action)
+        if only_approved:
+            action_query = action_query.filter(Action.is_approved.is_(True))
+        conditions = []
+        if github_orgs_ids:
+            conditions.append(Action.github_org_rel.has(
+                GitHubOrg.github_id.in_(github_orgs_ids),
+            ))
+        if groups_ids:
+            conditions.append(Action.groups.any(
+                Group.id.in_(groups_ids),
+            ))
+        if conditions:
+            action_query = action_query.filter(or_(*conditions))
+        return action_query.options(
+            *Action.eager_loading_options(with_groups=False),
+        ).order_by(asc(Action.id))
+
+
+class OrphanCandidate(Base):
+    """
+    Release, package or module stream which may be not referenced
+    anymore after an action was changed or deleted.
+    Candidates are checked and deleted in batches by the orphans GC
+    (see `db.utils.collect_orphans`), so edits of actions don't pay
+    for scanning of whole tables
+    """
+    __tablename__ = 'orphan_candidates'
+
+    table_name = Column(String, primary_key=True)
+    row_id = Column(Integer, primary_key=True)
+
+    @staticmethod
+    def add_candidates(
+            session: Session,
+            table_name: str,
+            rows_ids: Iterable[int | None],
+    ) -> None:
+        rows = [
+            {'table_name': table_name, 'row_id': row_id}
+            for row_id in set(rows_ids) if row_id is not None
+        ]
+        if rows:
+            session.execute(
+                insert(OrphanCandidate).values(rows).on_conflict_do_nothing(),
+            )
+
+    @staticmethod
+    def add_action_candidates(session: Session, action: Action) -> None:
+        """
+        Add releases and packages of an action before its change or deletion
+        """
+        OrphanCandidate.add_candidates(
+            session=session,
+            table_name=Release.__tablename__,
+            rows_ids=[action.source_release_id, action.target_release_id],
+        )
+        OrphanCandidate.add_candidates(
+            session=session,
+            table_name=Package.__tablename__,
+            rows_ids=[
+                package.id for package in
+                action.in_package_set + action.out_package_set
+            ],
+        )
+
+    @staticmethod
+    def add_all_rows(session: Session) -> None:
+        """
+        Make every release, package and module stream a candidate,
+        e.g. for the first run of the GC over already existing data
+        """
+        for model in (Release, Package, ModuleStream):
+            session.execute(insert(OrphanCandidate).from_select(
+                ['table_name', 'row_id'],
+                select(literal(model.__tablename__), model.id),
+            ).on_conflict_do_nothing())
+
+    @staticmethod
+    def collect_batch(session: Session, batch_size: int) -> int:
+        """
+        Check a batch of candidates of every table
+        and delete the ones which are orphans.
+        Candidates locked by a concurrent GC are skipped.
+        Packages are checked before modules streams,
+        because deleted packages make their modules streams candidates
+        :return: count of checked candidates
+        """
+        orphans_conditions = (
+            (Release, [
+                ~Release.actions_target.any(),
+                ~Release.actions_source.any(),
+            ]),
+            (Package, [
+                ~Package.actions_in.any(),
+                ~Package.actions_out.any(),
+            ]),
+            (ModuleStream, [
+                ~ModuleStream.packages.any(),
+            ]),
+        )
+        checked_count = 0
+        for model, conditions in orphans_conditions:
+            table_name = model.__tablename__
+            rows_ids = session.execute(select(OrphanCandidate.row_id).where(
+                OrphanCandidate.table_name == table_name,
+            ).limit(batch_size).with_for_update(
+                skip_locked=True,
+            )).scalars().all()
+            if not rows_ids:
+                continue
+            statement = delete(model).where(
+                model.id.in_(rows_ids),
+                *conditions,
+            ).execution_options(synchronize_session=False)
+            if model is Package:
+                OrphanCandidate.add_candidates(
+                    session=session,
+                    table_name=ModuleStream.__tablename__,
+                    rows_ids=session.execute(statement.returning(
+                        Package.module_stream_id,
+                    )).scalars().all(),
+                )
+            else:
+                session.execute(statement)
+            session.query(OrphanCandidate).filter(
+                OrphanCandidate.table_name == table_name,
+                OrphanCandidate.row_id.in_(rows_ids),
+            ).delete(synchronize_session=False)
+            checked_count += len(rows_ids)
+        return checked_count
@@ -0,0 +1,61 @@
+"""Primary keys of association tables and indexes of lookup columns
+
+Revision ID: 0b4e7d1a9c58
+Revises: f5a8c2e4b736
+Create Date: 2026-10-18 19:14:02.587316
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0b4e7d1a9c58'
+down_revision = 'f5a8c2e4b736'
+branch_labels = None
+depends_on = None
+
+PRIMARY_KEYS = (
+    ('users_github_orgs', ['user_id', 'github_org_id']),
+    ('groups_actions', ['action_id', 'group_id']),
+    ('actions_packages_in', ['action_id', 'package_id']),
+    ('actions_packages_out', ['action_id', 'package_id']),
+)
+
+INDEXES = (
+    ('users_github_orgs', 'users_github_orgs_github_org_id_user_id_idx',
+     ['github_org_id', 'user_id']),
+    ('groups', 'groups_github_org_id_idx', ['github_org_id']),
+    ('github_orgs', 'github_orgs_github_id_idx', ['github_id']),
+    ('users', 'users_github_id_idx', ['github_id']),
+    ('actions_history', 'actions_history_action_id_idx', ['action_id']),
+    ('actions_history', 'actions_history_username_idx', ['username']),
+    ('packages', 'packages_module_stream_id_idx', ['module_stream_id']),
+)
+
+
+def upgrade():
+    for table_name, columns in PRIMARY_KEYS:
+        first_column, second_column = columns
+        # links without one of sides are meaningless
+        op.execute(f"""
+            DELETE FROM {table_name}
+            WHERE {first_column} IS NULL OR {second_column} IS NULL
+        """)
+        op.execute(f"""
+            DELETE FROM {table_name} a USING {table_name} b
+            WHERE a.ctid > b.ctid
+            AND a.{first_column} = b.{first_column}
+            AND a.{second_column} = b.{second_column}
+        """)
+        op.create_primary_key(f'{table_name}_pkey', table_name, columns)
+    for table_name, index_name, columns in INDEXES:
+        op.create_index(index_name, table_name, columns)
+
+
+def downgrade():
+    for table_name, index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
+    for table_name, columns in reversed(PRIMARY_KEYS):
+        op.drop_constraint(f'{table_name}_pkey', table_name, type_='primary')
+        for column in columns:
+            op.alter_column(table_name, column, nullable=True)
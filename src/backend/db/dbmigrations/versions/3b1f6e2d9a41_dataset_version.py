@@ -0,0 +1,30 @@
+"""Dataset version
+
+Revision ID: 3b1f6e2d9a41
+Revises: d869d4894b07
+Create Date: 2026-10-18 10:12:41.503127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f6e2d9a41'
+down_revision = 'd869d4894b07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'dataset_versions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute('INSERT INTO dataset_versions (version) VALUES (1)')
+
+
+def downgrade():
+    op.drop_table('dataset_versions')
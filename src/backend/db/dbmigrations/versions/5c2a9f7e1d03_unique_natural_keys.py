@@ -0,0 +1,99 @@
+"""Unique natural keys of packages, releases and modules streams
+
+Revision ID: 5c2a9f7e1d03
+Revises: 8e4c0a7b52d6
+Create Date: 2026-10-18 15:12:43.508127
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2a9f7e1d03'
+down_revision = '8e4c0a7b52d6'
+branch_labels = None
+depends_on = None
+
+
+def _merge_duplicates(table, key, references):
+    """
+    Point references of duplicated rows to the row with the lowest id
+    and delete the duplicates
+    """
+    op.execute(f"""
+        CREATE TEMPORARY TABLE duplicates AS
+        SELECT id, min(id) OVER (PARTITION BY {key}) AS original_id
+        FROM {table}
+    """)
+    op.execute('DELETE FROM duplicates WHERE id = original_id')
+    for ref_table, ref_column in references:
+        op.execute(f"""
+            UPDATE {ref_table} SET {ref_column} = duplicates.original_id
+            FROM duplicates WHERE {ref_table}.{ref_column} = duplicates.id
+        """)
+    op.execute(f"""
+        DELETE FROM {table} USING duplicates
+        WHERE {table}.id = duplicates.id
+    """)
+    op.execute('DROP TABLE duplicates')
+
+
+def _delete_duplicated_links(table):
+    op.execute(f"""
+        DELETE FROM {table} a USING {table} b
+        WHERE a.ctid > b.ctid
+        AND a.action_id = b.action_id
+        AND a.package_id = b.package_id
+    """)
+
+
+def upgrade():
+    _merge_duplicates(
+        table='modules_streams',
+        key='name, stream',
+        references=[('packages', 'module_stream_id')],
+    )
+    _merge_duplicates(
+        table='releases',
+        key='os_name, major_version, minor_version',
+        references=[
+            ('actions', 'source_release_id'),
+            ('actions', 'target_release_id'),
+        ],
+    )
+    _merge_duplicates(
+        table='packages',
+        key='name, repository, type, coalesce(module_stream_id, 0)',
+        references=[
+            ('actions_packages_in', 'package_id'),
+            ('actions_packages_out', 'package_id'),
+        ],
+    )
+    _delete_duplicated_links('actions_packages_in')
+    _delete_duplicated_links('actions_packages_out')
+    op.create_unique_constraint(
+        'modules_streams_name_stream_key',
+        'modules_streams',
+        ['name', 'stream'],
+    )
+    op.create_unique_constraint(
+        'releases_os_name_major_version_minor_version_key',
+        'releases',
+        ['os_name', 'major_version', 'minor_version'],
+    )
+    op.execute("""
+        CREATE UNIQUE INDEX packages_natural_key ON packages
+        (name, repository, type, coalesce(module_stream_id, 0))
+    """)
+
+
+def downgrade():
+    op.drop_index('packages_natural_key', table_name='packages')
+    op.drop_constraint(
+        'releases_os_name_major_version_minor_version_key',
+        'releases',
+    )
+    op.drop_constraint(
+        'modules_streams_name_stream_key',
+        'modules_streams',
+    )
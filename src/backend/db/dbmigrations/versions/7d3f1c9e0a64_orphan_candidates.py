@@ -0,0 +1,29 @@
+"""Candidates for the orphans GC
+
+Revision ID: 7d3f1c9e0a64
+Revises: 0b4e7d1a9c58
+Create Date: 2026-10-18 19:52:47.031598
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3f1c9e0a64'
+down_revision = '0b4e7d1a9c58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'orphan_candidates',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('table_name', 'row_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('orphan_candidates')
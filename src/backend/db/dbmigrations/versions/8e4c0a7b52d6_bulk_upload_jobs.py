@@ -0,0 +1,48 @@
+"""Bulk upload jobs
+
+Revision ID: 8e4c0a7b52d6
+Revises: 3b1f6e2d9a41
+Create Date: 2026-10-18 13:40:07.214859
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c0a7b52d6'
+down_revision = '3b1f6e2d9a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'bulk_upload_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum(
+                'pending',
+                'running',
+                'done',
+                'failed',
+                name='bulkuploadjobstatus',
+            ),
+            nullable=False,
+        ),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('processed_count', sa.Integer(), nullable=False),
+        sa.Column('created_count', sa.Integer(), nullable=False),
+        sa.Column('failed_count', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade():
+    op.drop_table('bulk_upload_jobs')
+    op.execute('DROP TYPE bulkuploadjobstatus')
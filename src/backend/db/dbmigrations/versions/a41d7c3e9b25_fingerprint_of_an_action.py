@@ -0,0 +1,87 @@
+"""Fingerprint of an action
+
+Revision ID: a41d7c3e9b25
+Revises: 5c2a9f7e1d03
+Create Date: 2026-10-18 16:05:21.730412
+
+"""
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41d7c3e9b25'
+down_revision = '5c2a9f7e1d03'
+branch_labels = None
+depends_on = None
+
+
+def _get_fingerprint(row) -> str:
+    """
+    Fingerprint of an action as it's computed by `Action.get_fingerprint`
+    at this revision. It's copied, so the migration doesn't change
+    together with the model. An action type is stored by its name
+    """
+    content = [
+        row.action,
+        row.source_release_id,
+        row.target_release_id,
+        row.github_org_id,
+        sorted(set(row.in_packages_ids)),
+        sorted(set(row.out_packages_ids)),
+        sorted(set(row.arches.split(','))) if row.arches else [],
+    ]
+    return hashlib.sha256(json.dumps(content).encode()).hexdigest()
+
+
+def upgrade():
+    op.add_column(
+        'actions',
+        sa.Column('fingerprint', sa.String(), nullable=True),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(sa.text("""
+        SELECT
+            a.id,
+            a.action,
+            a.source_release_id,
+            a.target_release_id,
+            a.github_org_id,
+            a.arches,
+            array(
+                SELECT package_id FROM actions_packages_in
+                WHERE action_id = a.id
+            ) AS in_packages_ids,
+            array(
+                SELECT package_id FROM actions_packages_out
+                WHERE action_id = a.id
+            ) AS out_packages_ids
+        FROM actions a
+        ORDER BY a.id
+    """))
+    fingerprints = {}
+    for row in rows:
+        fingerprint = _get_fingerprint(row)
+        # already existing duplicates are left without a fingerprint
+        fingerprints.setdefault(fingerprint, row.id)
+    if fingerprints:
+        connection.execute(
+            sa.text('UPDATE actions SET fingerprint = :fp WHERE id = :id'),
+            [
+                {'fp': fingerprint, 'id': action_id}
+                for fingerprint, action_id in fingerprints.items()
+            ],
+        )
+    op.create_unique_constraint(
+        'actions_fingerprint_key',
+        'actions',
+        ['fingerprint'],
+    )
+
+
+def downgrade():
+    op.drop_constraint('actions_fingerprint_key', 'actions')
+    op.drop_column('actions', 'fingerprint')
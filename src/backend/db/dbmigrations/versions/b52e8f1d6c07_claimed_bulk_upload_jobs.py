@@ -0,0 +1,58 @@
+"""Bulk upload jobs are claimed through the DB
+
+Revision ID: b52e8f1d6c07
+Revises: 7d3f1c9e0a64
+Create Date: 2026-10-18 21:14:36.508172
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b52e8f1d6c07'
+down_revision = '7d3f1c9e0a64'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'bulk_upload_jobs',
+        sa.Column('file_path', sa.String(), nullable=True),
+    )
+    op.add_column(
+        'bulk_upload_jobs',
+        sa.Column('github_org_name', sa.String(), nullable=True),
+    )
+    op.add_column(
+        'bulk_upload_jobs',
+        sa.Column('github_org_github_id', sa.Integer(), nullable=True),
+    )
+    op.add_column(
+        'bulk_upload_jobs',
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+    )
+    # unfinished jobs of in-memory queues of workers can't be resumed
+    op.execute(
+        "UPDATE bulk_upload_jobs "
+        "SET status = 'failed', error = 'The job is interrupted', "
+        "finished_at = now() "
+        "WHERE status IN ('pending', 'running')"
+    )
+    op.create_index(
+        'bulk_upload_jobs_status_id_idx',
+        'bulk_upload_jobs',
+        ['status', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'bulk_upload_jobs_status_id_idx',
+        table_name='bulk_upload_jobs',
+    )
+    op.drop_column('bulk_upload_jobs', 'heartbeat_at')
+    op.drop_column('bulk_upload_jobs', 'github_org_github_id')
+    op.drop_column('bulk_upload_jobs', 'github_org_name')
+    op.drop_column('bulk_upload_jobs', 'file_path')
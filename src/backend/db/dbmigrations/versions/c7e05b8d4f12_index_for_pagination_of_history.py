@@ -0,0 +1,30 @@
+"""Index for pagination of history
+
+Revision ID: c7e05b8d4f12
+Revises: a41d7c3e9b25
+Create Date: 2026-10-18 17:02:36.914208
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e05b8d4f12'
+down_revision = 'a41d7c3e9b25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'actions_history_timestamp_id_idx',
+        'actions_history',
+        ['timestamp', 'id'],
+    )
+
+
+def downgrade():
+    op.drop_index(
+        'actions_history_timestamp_id_idx',
+        table_name='actions_history',
+    )
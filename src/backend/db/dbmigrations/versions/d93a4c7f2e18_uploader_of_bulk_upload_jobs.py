@@ -0,0 +1,31 @@
+"""Uploader of a bulk upload job
+
+Revision ID: d93a4c7f2e18
+Revises: b52e8f1d6c07
+Create Date: 2026-10-18 23:05:12.641093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93a4c7f2e18'
+down_revision = 'b52e8f1d6c07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'bulk_upload_jobs',
+        sa.Column('user_github_id', sa.Integer(), nullable=True),
+    )
+    op.execute(
+        'UPDATE bulk_upload_jobs SET user_github_id = users.github_id '
+        'FROM users WHERE users.github_login = bulk_upload_jobs.username'
+    )
+
+
+def downgrade():
+    op.drop_column('bulk_upload_jobs', 'user_github_id')
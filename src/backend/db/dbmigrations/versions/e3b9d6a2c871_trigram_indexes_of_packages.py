@@ -0,0 +1,38 @@
+"""Trigram indexes of packages
+
+Revision ID: e3b9d6a2c871
+Revises: c7e05b8d4f12
+Create Date: 2026-10-18 17:48:10.352691
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d6a2c871'
+down_revision = 'c7e05b8d4f12'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'packages_name_trgm_idx',
+        'packages',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'packages_repository_trgm_idx',
+        'packages',
+        ['repository'],
+        postgresql_using='gin',
+        postgresql_ops={'repository': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('packages_repository_trgm_idx', table_name='packages')
+    op.drop_index('packages_name_trgm_idx', table_name='packages')
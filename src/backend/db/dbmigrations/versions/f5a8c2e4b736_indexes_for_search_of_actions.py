@@ -0,0 +1,50 @@
+"""Indexes for search of actions
+
+Revision ID: f5a8c2e4b736
+Revises: e3b9d6a2c871
+Create Date: 2026-10-18 18:31:54.120937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5a8c2e4b736'
+down_revision = 'e3b9d6a2c871'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('actions', 'actions_source_release_id_id_idx',
+     ['source_release_id', 'id']),
+    ('actions', 'actions_target_release_id_id_idx',
+     ['target_release_id', 'id']),
+    ('actions', 'actions_github_org_id_id_idx', ['github_org_id', 'id']),
+    ('actions', 'actions_action_id_idx', ['action', 'id']),
+    ('actions', 'actions_is_approved_id_idx', ['is_approved', 'id']),
+    ('actions_packages_in', 'actions_packages_in_package_id_action_id_idx',
+     ['package_id', 'action_id']),
+    ('actions_packages_out', 'actions_packages_out_package_id_action_id_idx',
+     ['package_id', 'action_id']),
+    ('groups_actions', 'groups_actions_group_id_action_id_idx',
+     ['group_id', 'action_id']),
+    ('packages', 'packages_repository_idx', ['repository']),
+)
+
+
+def upgrade():
+    for table_name, index_name, columns in INDEXES:
+        op.create_index(index_name, table_name, columns)
+    op.create_index(
+        'actions_arches_idx',
+        'actions',
+        [sa.text("string_to_array(arches, ',')")],
+        postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('actions_arches_idx', table_name='actions')
+    for table_name, index_name, _ in reversed(INDEXES):
+        op.drop_index(index_name, table_name=table_name)
@@ -1,7 +1,14 @@
 # coding=utf-8
+from __future__ import annotations
+
 from collections import defaultdict
+from functools import lru_cache
 
 from common.forms import TARGET_RELEASES
+from db.data_models import (
+    ACTION_JSON_FIELDS,
+    ActionType,
+)
 from db.utils import get_major_version_list
 
 put_action = {
@@ -551,54 +558,160 @@ post_pull_request = {
     ]
 }
 
-get_dump = {
-    "$schema": "http://json-schema.org/draft-07/schema#",
-    "$ref": "#/definitions/Welcome4",
-    "definitions": {
-        "Welcome4": {
-            "type": "object",
-            "properties": {
-                "oses": {
-                    "type": "object",
-                    "patternProperties": {
-                        "^[0-9]$": {
-                            "$ref": "#/definitions/OsNames"
+
+def get_dump_schema() -> dict:
+    """
+    Versions of releases are taken from DB,
+    so the schema is made on demand instead of import
+    """
+    return {
+        "$schema": "http://json-schema.org/draft-07/schema#",
+        "$ref": "#/definitions/Welcome4",
+        "definitions": {
+            "Welcome4": {
+                "type": "object",
+                "properties": {
+                    "oses": {
+                        "type": "object",
+                        "patternProperties": {
+                            "^[0-9]$": {
+                                "$ref": "#/definitions/OsNames"
+                            }
+                        },
+                        "propertyNames": {
+                            "$ref": "#/definitions/Version"
+                        },
+                        "additionalProperties": False
+                    },
+                    "orgs": {
+                        "type": "array",
+                        "items": {
+                            "type": "string"
                         }
                     },
-                    "propertyNames": {
-                        "$ref": "#/definitions/Version"
+                    "groups": {
+                        "type": "array",
+                        "items": {
+                            "type": "string"
+                        }
+                    },
+                    "only_approved": {
+                        "type": "boolean",
+                    },
+                    "stream": {
+                        "type": "boolean",
                     },
-                    "additionalProperties": False
-                },
-                "orgs": {
-                    "type": "array",
-                    "items": {
-                        "type": "string"
-                    }
                 },
-                "groups": {
-                    "type": "array",
-                    "items": {
-                        "type": "string"
-                    }
+                "required": [
+                    "oses",
+                ]
+            },
+            "Version": {
+                "type": "string",
+                "enum": [str(i) for i in get_major_version_list()]
+            },
+            "OsNames": {
+                "type": "string",
+                "enum": TARGET_RELEASES,
+            },
+        }
+    }
+
+
+search_release = {
+    "type": "object",
+    "properties": {
+        "os_name": {
+            "type": "string",
+        },
+        "major_version": {
+            "type": "integer",
+        },
+        "minor_version": {
+            "type": "integer",
+        },
+    },
+    "additionalProperties": False,
+}
+
+search_actions = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "type": "object",
+    "properties": {
+        "package": {
+            "type": "string",
+        },
+        "repository": {
+            "type": "string",
+        },
+        "modulestream": {
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
                 },
-                "only_approved": {
-                    "type": "boolean",
+                "stream": {
+                    "type": "string",
                 },
             },
-            "required": [
-                "oses",
-            ]
+            "additionalProperties": False,
         },
-        "Version": {
+        "packageset": {
             "type": "string",
-            "enum": [str(i) for i in get_major_version_list()]
+            "enum": ["in", "out", "any"],
+        },
+        "initial_release": search_release,
+        "release": search_release,
+        "action": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "enum": ActionType.get_type_list(),
+            },
+            "minItems": 1,
         },
-        "OsNames": {
+        "orgs": {
+            "type": "array",
+            "items": {
+                "type": "string",
+            },
+            "minItems": 1,
+        },
+        "architectures": {
+            "type": "array",
+            "items": {
+                "type": "string",
+            },
+            "minItems": 1,
+        },
+        "is_approved": {
+            "type": "boolean",
+        },
+        "groups": {
+            "type": "array",
+            "items": {
+                "type": "integer",
+            },
+            "minItems": 1,
+        },
+        "fields": {
+            "type": "array",
+            "items": {
+                "type": "string",
+                "enum": list(ACTION_JSON_FIELDS),
+            },
+            "minItems": 1,
+        },
+        "cursor": {
             "type": "string",
-            "enum": TARGET_RELEASES,
         },
-    }
+        "limit": {
+            "type": "integer",
+            "minimum": 1,
+            "maximum": 1000,
+        },
+    },
+    "additionalProperties": False,
 }
 
 delete_group = {
@@ -615,21 +728,30 @@ delete_group = {
 }
 
 
-json_schema_mapping = defaultdict(dict, {
-    '/api/actions': {
-        'PUT': put_action,
-        'GET': get_actions,
-        'POST': post_action,
-        'DELETE': delete_action,
-    },
-    '/api/pull_requests': {
-        'GET': None,
-        'POST': post_pull_request,
-    },
-    '/api/dump': {
-        'GET': get_dump,
-    },
-    '/api/groups': {
-        'DELETE': delete_group,
-    },
-})
+@lru_cache(maxsize=None)
+def get_json_schema_mapping() -> dict[str, dict[str, dict | None]]:
+    """
+    Schemas of methods of API rules, they are made once on first use
+    """
+    return defaultdict(dict, {
+        '/api/actions': {
+            'PUT': put_action,
+            'GET': get_actions,
+            'POST': post_action,
+            'DELETE': delete_action,
+        },
+        '/api/pull_requests': {
+            'GET': None,
+            'POST': post_pull_request,
+        },
+        '/api/dump': {
+            'GET': get_dump_schema(),
+        },
+        '/api/groups': {
+            'DELETE': delete_group,
+        },
+        '/api/actions/search': {
+            'GET': search_actions,
+            'POST': search_actions,
+        },
+    })
@@ -0,0 +1,281 @@
+# coding=utf-8
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+)
+
+from sqlalchemy import (
+    asc,
+    desc,
+    func,
+    select,
+    DateTime,
+    text,
+    tuple_,
+)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Query
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy_pagination import Page
+
+from api.exceptions import BadRequestFormatExceptioin
+from common.cache import LRUCache
+from common.sentry import get_logger
+
+# result sets up to this size are counted exactly
+EXACT_COUNT_LIMIT = int(os.environ.get('EXACT_COUNT_LIMIT', 10000))
+COUNT_CACHE_SIZE = int(os.environ.get('COUNT_CACHE_SIZE', 256))
+COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 60))
+
+logger = get_logger(__name__)
+count_cache = LRUCache(
+    max_size=COUNT_CACHE_SIZE,
+    ttl=COUNT_CACHE_TTL,
+    name='count',
+)
+
+
+class KeysetPage:
+    """
+    Page of a listing which is selected by a cursor instead of an offset,
+    so a cost of a page doesn't depend on how deep it is
+    """
+
+    is_keyset = True
+
+    def __init__(
+            self,
+            items: list,
+            page_size: int,
+            next_cursor: str | None,
+            previous_cursor: str | None,
+    ):
+        self.items = items
+        self.page_size = page_size
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.has_next = next_cursor is not None
+        self.has_previous = previous_cursor is not None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(value: Any, column: ColumnElement) -> Any:
+    if value is not None and isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def encode_cursor(values: list, is_backward: bool) -> str:
+    """
+    Make an opaque cursor from values of keys of an item
+    """
+    data = json.dumps({
+        'keys': [_encode_value(value) for value in values],
+        'backward': is_backward,
+    })
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(
+        cursor: str,
+        columns: list[ColumnElement],
+) -> tuple[list, bool]:
+    """
+    :return: values of keys of an item and direction of pagination
+    """
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        values = [
+            _decode_value(value, column)
+            for value, column in zip(data['keys'], columns)
+        ]
+        is_backward = bool(data['backward'])
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise BadRequestFormatExceptioin('Invalid cursor "%s"', cursor)
+    if len(values) != len(columns):
+        raise BadRequestFormatExceptioin('Invalid cursor "%s"', cursor)
+    return values, is_backward
+
+
+def paginate_by_keyset(
+        query: Query,
+        columns: list[ColumnElement],
+        page_size: int,
+        cursor: str = None,
+        get_keys: Callable[[Any], list] = None,
+) -> KeysetPage:
+    """
+    Select a page of items which follow (or precede) an item
+    from a cursor in ascending order of passed columns.
+    The columns should be unique together and covered by an index
+    :param get_keys: function which returns values of the columns
+                     of an item, attributes of an item are used if None
+    """
+    keys = tuple_(*columns)
+    is_backward = False
+    if cursor is not None:
+        values, is_backward = decode_cursor(cursor, columns)
+        if is_backward:
+            query = query.filter(keys < tuple_(*values))
+        else:
+            query = query.filter(keys > tuple_(*values))
+    direction = desc if is_backward else asc
+    query = query.order_by(None).order_by(
+        *(direction(column) for column in columns),
+    )
+    items = query.limit(page_size + 1).all()
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if is_backward:
+        items.reverse()
+    if not items:
+        return KeysetPage(
+            items=items,
+            page_size=page_size,
+            next_cursor=None,
+            previous_cursor=None,
+        )
+
+    def get_cursor(item: Any, is_backward: bool) -> str:
+        if get_keys is None:
+            values = [getattr(item, column.key) for column in columns]
+        else:
+            values = get_keys(item)
+        return encode_cursor(values=values, is_backward=is_backward)
+
+    if is_backward:
+        has_previous, has_next = has_more, True
+    else:
+        has_previous, has_next = cursor is not None, has_more
+    return KeysetPage(
+        items=items,
+        page_size=page_size,
+        next_cursor=get_cursor(items[-1], False) if has_next else None,
+        previous_cursor=get_cursor(items[0], True) if has_previous else None,
+    )
+
+
+def _get_cache_key(query: Query) -> tuple[str, str]:
+    compiled = query.statement.compile()
+    return str(compiled), repr(sorted(compiled.params.items()))
+
+
+def _estimate_count(query: Query) -> int:
+    """
+    Get a row estimate of PostgreSQL's planner.
+    Statistics of a table are used if a query isn't filtered
+    """
+    session = query.session
+    entity = query.column_descriptions[0]['entity']
+    if query.whereclause is None and hasattr(entity, '__table__'):
+        return int(session.execute(
+            text(
+                'SELECT reltuples FROM pg_class '
+                'WHERE oid = CAST(:table AS regclass)',
+            ),
+            {'table': entity.__table__.name},
+        ).scalar())
+    statement = query.order_by(None).statement.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={'literal_binds': True},
+    )
+    plan = session.execute(
+        text(f'EXPLAIN (FORMAT JSON) {statement}'),
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_query(query: Query) -> tuple[int, bool]:
+    """
+    Count rows of a query.
+    Small result sets are counted exactly, large ones are estimated
+    by PostgreSQL's planner. Results are cached for a short time
+    :return: count and a flag that the count is exact
+    """
+    cache_key = _get_cache_key(query)
+    result = count_cache.get(cache_key)
+    if result is not None:
+        return result
+    query = query.order_by(None)
+    session = query.session
+    if session.get_bind().dialect.name != 'postgresql':
+        result = query.count(), True
+    else:
+        capped_count = session.execute(select(func.count()).select_from(
+            query.limit(EXACT_COUNT_LIMIT + 1).subquery(),
+        )).scalar()
+        result = capped_count, True
+        if capped_count > EXACT_COUNT_LIMIT:
+            try:
+                # the session may be shared by a whole request,
+                # a failed estimate mustn't abort its transaction
+                with session.begin_nested():
+                    estimated_count = _estimate_count(query)
+                result = max(estimated_count, capped_count), False
+            except SQLAlchemyError as error:
+                logger.warning('Cannot estimate count of rows: %s', error)
+    count_cache.set(cache_key, result)
+    return result
+
+
+def paginate_by_page(query: Query, page: int, page_size: int) -> Page:
+    """
+    Select a page by its number.
+    Unlike `sqlalchemy_pagination.paginate` total count of items
+    may be approximate, see `count_query`
+    """
+    if page <= 0:
+        raise BadRequestFormatExceptioin('Page needs to be >= 1')
+    items = query.limit(page_size + 1).offset((page - 1) * page_size).all()
+    total, is_total_exact = count_query(query)
+    pagination = Page(
+        items=items[:page_size],
+        page=page,
+        page_size=page_size,
+        total=max(total, (page - 1) * page_size + len(items)),
+    )
+    # an estimate isn't used for deciding whether a next page exists
+    pagination.has_next = len(items) > page_size
+    pagination.next_page = page + 1 if pagination.has_next else None
+    pagination.is_total_exact = is_total_exact
+    return pagination
+
+
+def paginate_query(
+        query: Query,
+        columns: list[ColumnElement],
+        page_size: int,
+        page: int = None,
+        cursor: str = None,
+        get_keys: Callable[[Any], list] = None,
+) -> Page | KeysetPage:
+    """
+    Paginate a query by page numbers if a page is passed
+    or by a cursor otherwise
+    """
+    if page is None:
+        return paginate_by_keyset(
+            query=query,
+            columns=columns,
+            page_size=page_size,
+            cursor=cursor,
+            get_keys=get_keys,
+        )
+    query = query.order_by(None).order_by(
+        *(asc(column) for column in columns),
+    )
+    return paginate_by_page(query=query, page=page, page_size=page_size)
@@ -0,0 +1,151 @@
+# coding=utf-8
+from __future__ import annotations
+
+import heapq
+import os
+import time
+
+import sentry_sdk
+from flask import (
+    Flask,
+    Response,
+    g,
+    has_app_context,
+    request,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine as SQLAlchemyEngine
+
+from common.sentry import get_logger
+
+SQL_STATS_ENABLED = os.environ.get('SQL_STATS_ENABLED', 'False') == 'True'
+# count of the slowest statements of a request which are reported
+SQL_STATS_SLOWEST_COUNT = int(os.environ.get('SQL_STATS_SLOWEST_COUNT', 3))
+# statements are cut to that length in logs and Sentry
+SQL_STATS_STATEMENT_LENGTH = int(
+    os.environ.get('SQL_STATS_STATEMENT_LENGTH', 200),
+)
+
+logger = get_logger(__name__)
+
+
+class QueryStats:
+    """
+    Count and time of SQL statements which are executed by a request
+    """
+
+    def __init__(self, slowest_count: int = SQL_STATS_SLOWEST_COUNT):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_count = slowest_count
+        self._slowest = []  # type: list[tuple[float, int, str]]
+
+    def add(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.total_time += duration
+        item = (duration, self.count, statement)
+        if len(self._slowest) < self.slowest_count:
+            heapq.heappush(self._slowest, item)
+        elif self._slowest and duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @property
+    def slowest(self) -> list[tuple[float, str]]:
+        """
+        :return: durations (in seconds) and statements, the slowest first
+        """
+        return [
+            (
+                duration,
+                ' '.join(statement.split())[:SQL_STATS_STATEMENT_LENGTH],
+            ) for duration, _, statement in sorted(self._slowest, reverse=True)
+        ]
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'total_time_ms': round(self.total_time * 1000, 3),
+            'slowest': [
+                {
+                    'time_ms': round(duration * 1000, 3),
+                    'statement': statement,
+                } for duration, statement in self.slowest
+            ],
+        }
+
+
+def _before_cursor_execute(
+        conn,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+) -> None:
+    conn.info['query_started_at'] = time.perf_counter()
+
+
+def _after_cursor_execute(
+        conn,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+) -> None:
+    if has_app_context() and 'sql_stats' in g:
+        g.sql_stats.add(
+            statement,
+            time.perf_counter() - conn.info['query_started_at'],
+        )
+
+
+def _start_request_stats() -> None:
+    g.sql_stats = QueryStats()
+
+
+def _report_request_stats(response: Response) -> Response:
+    stats = g.pop('sql_stats', None)  # type: QueryStats
+    if stats is None:
+        return response
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={stats.total_time * 1000:.3f};desc="{stats.count} queries"',
+    )
+    logger.info(
+        'Route "%s" executed %s SQL statements in %.3f ms, the slowest: %s',
+        request.endpoint,
+        stats.count,
+        stats.total_time * 1000,
+        '; '.join(
+            f'{duration * 1000:.3f} ms "{statement}"'
+            for duration, statement in stats.slowest
+        ),
+    )
+    data = stats.to_dict()
+    with sentry_sdk.configure_scope() as scope:
+        scope.set_context('sql', data)
+        if scope.span is not None:
+            scope.span.set_data('db.statements', data)
+    return response
+
+
+def init_query_stats(app: Flask) -> None:
+    """
+    Record count and time of SQL statements of every request of an app.
+    It's done if SQL_STATS_ENABLED is set only
+    """
+    if not SQL_STATS_ENABLED:
+        return
+    event.listen(
+        SQLAlchemyEngine,
+        'before_cursor_execute',
+        _before_cursor_execute,
+    )
+    event.listen(
+        SQLAlchemyEngine,
+        'after_cursor_execute',
+        _after_cursor_execute,
+    )
+    app.before_request(_start_request_stats)
+    app.after_request(_report_request_stats)
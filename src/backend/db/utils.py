@@ -2,40 +2,88 @@
 import logging
 import os
 import shutil
+import threading
 from contextlib import contextmanager
 
 from alembic import command, script
+from flask import (
+    g,
+    has_app_context,
+)
 from alembic.config import Config
 from alembic.runtime.migration import MigrationContext
 from db.data_models import GENERIC_OS_NAME
 from sqlalchemy.exc import OperationalError
 
 from db.db_engine import Engine
-from db.db_models import Base, Release
+from db.db_models import Base, OrphanCandidate, Release
 from sqlalchemy.engine.reflection import Inspector
 from sqlalchemy.orm import Session, sessionmaker
 
 BASE_REVISION = 'base'
+ORPHANS_GC_BATCH_SIZE = int(os.environ.get('ORPHANS_GC_BATCH_SIZE', 1000))
+
+
+session_factory = sessionmaker(autoflush=False)
+
+
+def _get_app_context_session() -> Session:
+    """
+    Get a session which is shared by all DB operations of an app context
+    (i.e. of a request or of a background job). It's created lazily
+    on a single connection and it's closed by `close_app_context_session`
+    """
+    if 'db_session' not in g:
+        g.db_connection = Engine.get_instance().connect()
+        # objects stay loaded in the identity map between transactions
+        g.db_session = session_factory(
+            bind=g.db_connection,
+            expire_on_commit=False,
+        )
+        g.db_session_depth = 0
+    return g.db_session
+
+
+def close_app_context_session(exception: BaseException = None) -> None:
+    """
+    Teardown callback of an app context
+    """
+    session = g.pop('db_session', None)
+    connection = g.pop('db_connection', None)
+    g.pop('db_session_depth', None)
+    if session is not None:
+        session.close()
+    if connection is not None:
+        connection.close()
 
 
 @contextmanager
 def session_scope() -> Session:
     """
-    Provide a transactional scope around a series of operations
+    Provide a transactional scope around a series of operations.
+    Inside an app context all scopes share one session and the outermost
+    scope commits, otherwise a scope uses its own session
     """
-    my_session_class = sessionmaker(
-        bind=Engine.get_instance(),
-        autoflush=False,
-    )
-    with my_session_class() as session:
-        try:
-            yield session
+    if not has_app_context():
+        with session_factory(bind=Engine.get_instance()) as session:
+            try:
+                yield session
+                session.commit()
+            except:
+                session.rollback()
+                raise
+        return
+    session = _get_app_context_session()
+    g.db_session_depth += 1
+    try:
+        yield session
+        if g.db_session_depth == 1:
             session.commit()
-        except:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+    except:
+        session.rollback()
+        raise
+    finally:
+        g.db_session_depth -= 1
 
 
 def is_db_exists():
@@ -166,3 +214,51 @@ def get_major_version_list() -> list[str]:
     with session_scope() as session:
         releases = session.query(Release.major_version).distinct().all()
         return sorted([release[0] for release in releases])
+
+
+def collect_orphans(
+        batch_size: int = ORPHANS_GC_BATCH_SIZE,
+        all_rows: bool = False,
+) -> int:
+    """
+    Delete releases, packages and modules streams which aren't referenced
+    by actions anymore. Only rows which were detached from actions since
+    the last run are checked, each batch is a separate transaction
+    :param batch_size: count of candidates of a table which are checked
+                       in one transaction
+    :param all_rows: check all rows instead of detached ones
+    :return: count of checked rows
+    """
+    if all_rows:
+        with session_scope() as session:
+            OrphanCandidate.add_all_rows(session=session)
+    checked_count = 0
+    while True:
+        with session_scope() as session:
+            batch_count = OrphanCandidate.collect_batch(
+                session=session,
+                batch_size=batch_size,
+            )
+        if not batch_count:
+            break
+        checked_count += batch_count
+    logging.info('Orphans GC checked %s rows', checked_count)
+    return checked_count
+
+
+def start_orphans_gc_scheduler(interval: int) -> threading.Thread:
+    """
+    Run the orphans GC in a daemon thread every `interval` seconds
+    """
+    def run():
+        while not stop_event.wait(interval):
+            try:
+                collect_orphans()
+            except Exception:
+                logging.exception('Orphans GC is failed')
+
+    stop_event = threading.Event()
+    thread = threading.Thread(target=run, name='orphans-gc', daemon=True)
+    thread.stop_event = stop_event
+    thread.start()
+    return thread
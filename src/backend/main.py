@@ -1,7 +1,8 @@
 # coding=utf-8
 from __future__ import annotations
 
-import json
+import gc
+import os
 import uuid
 
 from datetime import datetime
@@ -11,16 +12,20 @@ from webargs.flaskparser import use_args
 
 from api.exceptions import (
     BaseCustomException,
-    BadRequestFormatExceptioin,
     CustomHTTPError,
 )
 from api.handlers import (
     push_action,
+    create_action_data,
     get_actions,
-    dump_pes_json,
+    get_cached_pes_json,
+    stream_pes_json,
     remove_action,
     modify_action,
     bulk_upload_handler,
+    start_bulk_upload_job,
+    start_bulk_upload_jobs_scheduler,
+    get_bulk_upload_job_handler,
     dump_handler,
     authorized_handler,
     add_or_edit_action_handler,
@@ -31,6 +36,7 @@ from api.handlers import (
     get_users_handler,
     get_history_handler,
     search_actions_handler,
+    structured_search_actions_handler,
     add_or_edit_group_of_actions_handler,
     get_groups_of_actions_handler,
     get_group_of_actions_handler,
@@ -40,6 +46,7 @@ from api.utils import (
     success_result,
     error_result,
     jsonify_response,
+    textify_response,
     validate_json,
     membership_requires,
     login_requires,
@@ -47,6 +54,7 @@ from api.utils import (
     clear_sessions_fields_before_logout,
     get_user_organizations,
     get_groups,
+    json_validators,
 )
 from common.forms import (
     BulkUpload,
@@ -54,15 +62,26 @@ from common.forms import (
     AddAction,
     AddGroupActions, TARGET_RELEASES, DumpOsVersions,
 )
+from common.json_stream import iter_json_array_items
+from common.metrics import (
+    get_metrics,
+    init_metrics,
+)
+from common.profiler import (
+    get_profile_path,
+    get_profile_stats,
+    init_profiler,
+    list_profiles,
+)
 from common.sentry import (
     init_sentry_client,
     get_logger,
 )
-from db.data_models import (
-    ActionData,
-    GroupActionsData,
-)
+from db.data_models import GroupActionsData
 from flask import (
+    Flask,
+    abort,
+    send_file,
     request,
     Response,
     render_template,
@@ -70,30 +89,104 @@ from flask import (
     g,
     url_for,
     session,
+    stream_with_context,
+)
+from flask_api.status import (
+    HTTP_200_OK,
+    HTTP_404_NOT_FOUND,
 )
-from flask_api.status import HTTP_200_OK
 from flask_github import GitHub
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import configure_mappers
 from werkzeug.exceptions import InternalServerError
 
-from db.utils import get_major_version_list
+from db.db_engine import Engine
+from db.query_stats import init_query_stats
+from db.utils import (
+    close_app_context_session,
+    get_major_version_list,
+    start_orphans_gc_scheduler,
+)
+
+# seconds between runs of the orphans GC by every worker,
+# 0 disables it, then the GC has to be run by the CLI
+ORPHANS_GC_INTERVAL = int(os.environ.get('ORPHANS_GC_INTERVAL', 300))
+# seconds between checks of bulk upload jobs left by restarted workers
+BULK_UPLOAD_CHECK_INTERVAL = int(
+    os.environ.get('BULK_UPLOAD_CHECK_INTERVAL', 60),
+)
+# gunicorn imports the app in the master process, see wsgi.ini.py
+PRELOAD_APP = os.environ.get('PRELOAD_APP', 'False') == 'True'
 
-app = create_flask_application()
-init_sentry_client()
 logger = get_logger(__name__)
-github = GitHub(app)
+github = GitHub()
+
+
+def init_process() -> None:
+    """
+    Initialize a state of a worker process which isn't inherited by fork.
+    Sentry client, the orphans GC and the check of bulk upload jobs
+    run their own threads
+    """
+    init_sentry_client()
+    if ORPHANS_GC_INTERVAL > 0:
+        start_orphans_gc_scheduler(ORPHANS_GC_INTERVAL)
+    if BULK_UPLOAD_CHECK_INTERVAL > 0:
+        start_bulk_upload_jobs_scheduler(
+            app=app,
+            interval=BULK_UPLOAD_CHECK_INTERVAL,
+        )
+
+
+def warm_up_app() -> None:
+    """
+    Build immutable state of the app in the master process before fork,
+    so workers share its memory pages instead of building own copies
+    """
+    configure_mappers()
+    for template_name in app.jinja_env.list_templates(
+        filter_func=lambda name: name.endswith('.html'),
+    ):
+        app.jinja_env.get_template(template_name)
+    try:
+        json_validators.warm_up()
+    except SQLAlchemyError as error:
+        logger.warning('Cannot build JSON validators: %s', error)
+    # workers open their own connections
+    Engine.dispose()
+    # objects of the master aren't touched by GC of workers,
+    # so their pages aren't copied
+    gc.freeze()
+
 
 GET_ACTIONS_ARGS = {
     'package': fields.String()
 }
 
 
-@app.context_processor
 def inject_now_date():
     return {
         'now': datetime.utcnow(),
     }
 
 
+def inject_pagination_url():
+    def pagination_url(**kwargs) -> str:
+        """
+        Build URL of another page of the current listing
+        :param kwargs: `page` or `cursor` of the page
+        """
+        url_args = {**request.view_args, **request.args.to_dict()}
+        url_args.pop('page', None)
+        url_args.pop('cursor', None)
+        url_args.update(kwargs)
+        return url_for(request.endpoint, **url_args)
+
+    return {
+        'pagination_url': pagination_url,
+    }
+
+
 def _prepare_data_dict() -> dict[str, str | bool]:
     data = {
         'logged': bool(g.user_data.github_login),
@@ -104,7 +197,6 @@ def _prepare_data_dict() -> dict[str, str | bool]:
     return data
 
 
-@app.before_request
 def before_request():
     before_request_handler()
 
@@ -116,7 +208,6 @@ def token_getter():
         return user_data.github_access_token
 
 
-@app.route('/github-callback')
 @github.authorized_handler
 def authorized(access_token):
     next_url = session.pop('next_url', None) or url_for('index')
@@ -126,10 +217,6 @@ def authorized(access_token):
     return redirect(next_url)
 
 
-@app.route(
-    '/login',
-    methods=('GET',),
-)
 def login():
     if session.get('github_id', None) is None:
         session.update({
@@ -142,21 +229,15 @@ def login():
         return 'Already logged in'
 
 
-@app.route('/logout', methods=('GET',))
 @clear_sessions_fields_before_logout
 def logout():
     return redirect(url_for('index'))
 
 
-@app.route('/')
 def index():
     return render_template('index.html', **_prepare_data_dict())
 
 
-@app.route(
-    '/bulk_upload',
-    methods=('GET', 'POST',),
-)
 @login_requires
 @membership_requires
 def bulk_upload():
@@ -169,22 +250,22 @@ def bulk_upload():
     }
     data.update(_prepare_data_dict())
     if bulk_upload_form.validate_on_submit():
-        try:
-            json_dict = json.load(bulk_upload_form.uploaded_file.data)
-        except json.JSONDecodeError:
-            raise BadRequestFormatExceptioin('The JSON file is incorrect')
-        bulk_upload_handler(
-            json_dict=json_dict,
-            bulk_upload_form=bulk_upload_form,
-        )
+        if bulk_upload_form.in_background.data:
+            data['job_id'] = start_bulk_upload_job(
+                bulk_upload_form=bulk_upload_form,
+            )
+        else:
+            bulk_upload_handler(
+                actions=iter_json_array_items(
+                    stream=bulk_upload_form.uploaded_file.data,
+                    key='packageinfo',
+                ),
+                bulk_upload_form=bulk_upload_form,
+            )
         data['is_uploaded'] = True,
     return render_template('bulk_upload.html', **data)
 
 
-@app.route(
-    '/dump',
-    methods=('GET', 'POST',),
-)
 def dump_json():
     dump_form = Dump()
     for i, os_version in enumerate(get_major_version_list()):
@@ -199,25 +280,22 @@ def dump_json():
     }
     data.update(_prepare_data_dict())
     if dump_form.validate_on_submit():
-        req = dump_handler(
-            oses={
-                os.os_version.data: os.os_name.data for os in dump_form.oses
-            },
-            organizations=dump_form.orgs.data,
-            groups=dump_form.groups.data,
-            only_approved=dump_form.only_approved.data,
-        )
-        return jsonify_response(
-            result=req.json,
-            status_code=HTTP_200_OK,
+        return Response(
+            dump_handler(
+                oses={
+                    os.os_version.data: os.os_name.data
+                    for os in dump_form.oses
+                },
+                organizations=dump_form.orgs.data,
+                groups=dump_form.groups.data,
+                only_approved=dump_form.only_approved.data,
+            ),
+            status=HTTP_200_OK,
+            mimetype='application/json',
         )
     return render_template('dump.html', **data)
 
 
-@app.route(
-    '/view_action/<int:action_id>',
-    methods=('GET',),
-)
 def view_action(action_id: int):
     data = {
         'action': get_action_handler(action_id),
@@ -226,10 +304,6 @@ def view_action(action_id: int):
     return render_template('view_action.html', **data)
 
 
-@app.route(
-    '/add_action',
-    methods=('GET', 'POST',),
-)
 @login_requires
 def add_action():
     add_action_form = AddAction()
@@ -250,10 +324,6 @@ def add_action():
     return render_template('add_action.html', **data)
 
 
-@app.route(
-    '/add_group',
-    methods=('GET', 'POST',),
-)
 @login_requires
 def add_group():
     add_group_form = AddGroupActions()
@@ -276,10 +346,6 @@ def add_group():
     return render_template('add_group_of_actions.html', **data)
 
 
-@app.route(
-    '/edit_action/<int:action_id>',
-    methods=('GET', 'POST',),
-)
 @login_requires
 def edit_action(action_id: int):
     edit_action_form = AddAction()
@@ -311,10 +377,6 @@ def edit_action(action_id: int):
     return render_template('add_action.html', **data)
 
 
-@app.route(
-    '/edit_group/<int:group_id>',
-    methods=('GET', 'POST',),
-)
 @login_requires
 def edit_group(group_id: int):
     edit_group_of_actions_form = AddGroupActions()
@@ -343,11 +405,12 @@ def edit_group(group_id: int):
     return render_template('add_group_of_actions.html', **data)
 
 
-@app.route('/users', methods=('GET',))
-@app.route('/users/<int:page>', methods=('GET',))
 @login_requires
-def get_users(page: int = 1):
-    list_users, pagination = get_users_handler(page=page)
+def get_users(page: int = None):
+    list_users, pagination = get_users_handler(
+        page=page,
+        cursor=request.args.get('cursor'),
+    )
     setattr(pagination, 'page', page)
     data = {
         'main_title': 'List of registered users',
@@ -359,12 +422,11 @@ def get_users(page: int = 1):
     return render_template('users.html', **data)
 
 
-@app.route('/group_of_actions', methods=('GET',))
-@app.route('/group_of_actions/<int:page>', methods=('GET',))
 @login_requires
-def get_group_of_actions(page: int = 1):
+def get_group_of_actions(page: int = None):
     list_groups_of_actions, pagination = get_groups_of_actions_handler(
-        page=page
+        page=page,
+        cursor=request.args.get('cursor'),
     )
     setattr(pagination, 'page', page)
     data = {
@@ -377,18 +439,17 @@ def get_group_of_actions(page: int = 1):
     return render_template('group_of_actions.html', **data)
 
 
-@app.route('/history', methods=('GET',))
-@app.route('/history/<int:page>', methods=('GET',))
-@app.route('/history_by_action/<int:action_id>', methods=('GET',))
-@app.route('/history_by_action/<int:action_id>/<int:page>', methods=('GET',))
-@app.route('/history_by_user/<string:username>', methods=('GET',))
-@app.route('/history_by_user/<string:username>/<int:page>', methods=('GET',))
 @login_requires
-def get_history(page: int = 1, action_id: int = None, username: str = None):
+def get_history(
+        page: int = None,
+        action_id: int = None,
+        username: str = None,
+):
     list_actions_history, pagination = get_history_handler(
         page=page,
         action_id=action_id,
         username=username,
+        cursor=request.args.get('cursor'),
     )
     setattr(pagination, 'page', page)
     if action_id is not None:
@@ -408,10 +469,6 @@ def get_history(page: int = 1, action_id: int = None, username: str = None):
     return render_template('history.html', **data)
 
 
-@app.route(
-    '/api/groups',
-    methods=('DELETE',),
-)
 @success_result
 @error_result
 @validate_json
@@ -423,21 +480,14 @@ def groups():
         return remove_group(group)
 
 
-@app.route(
-    '/api/actions',
-    methods=('GET', 'PUT', 'DELETE', 'POST'),
-)
 @success_result
 @error_result
 @validate_json
 @login_requires
 def actions():
     data = request.json
-    _is_our_member = session.get('is_our_member', False)
-    action = ActionData.create_from_json(data)
+    action = create_action_data(data)
     logger.warning(action)
-    action.is_approved = action.is_approved or \
-                         g.user_data.is_in_org(action.github_org.name)
     if request.method == 'PUT':
         return push_action(action)
     elif request.method == 'GET':
@@ -448,12 +498,8 @@ def actions():
         return remove_action(action)
 
 
-@app.route('/actions', methods=('GET',))
-@app.route('/actions/<int:page>', methods=('GET',))
-@app.route('/actions/group/<int:group_id>', methods=('GET',))
-@app.route('/actions/group/<int:group_id>/<int:page>', methods=('GET',))
 @use_args(GET_ACTIONS_ARGS, location='query')
-def get_list_actions(url_args, page: int = 1, group_id: int = None):
+def get_list_actions(url_args, page: int = None, group_id: int = None):
     data = {
         'main_title': 'List of actions',
         'search_value': url_args.get('package', ''),
@@ -465,11 +511,13 @@ def get_list_actions(url_args, page: int = 1, group_id: int = None):
             params=url_args,
             group_id=group_id,
             page=page,
+            cursor=request.args.get('cursor'),
         )
     else:
         list_actions, pagination = get_actions_handler(
             page=page,
             group_id=group_id,
+            cursor=request.args.get('cursor'),
         )
     data.update({
         'actions': list_actions,
@@ -480,10 +528,6 @@ def get_list_actions(url_args, page: int = 1, group_id: int = None):
     return render_template('actions.html', **data)
 
 
-@app.route(
-    '/api/pull_requests',
-    methods=('POST', 'GET'),
-)
 @success_result
 @error_result
 @validate_json
@@ -494,24 +538,77 @@ def pull_requests():
         return approve_pull_request(data)
 
 
-@app.route(
-    '/api/dump',
-    methods=('GET',),
-)
+@success_result
+@error_result
+@login_requires
+def bulk_upload_job(job_id: int):
+    return get_bulk_upload_job_handler(job_id).dump()
+
+
 @success_result
 @error_result
 @validate_json
 def dump():
     data = request.json
-    return dump_pes_json(
-        oses=data['oses'],
-        organizations=data.get('orgs', []),
-        groups=data.get('groups', []),
-        only_approved=data.get('only_approved', True),
+    if data.get('stream', False):
+        return Response(
+            stream_with_context(stream_pes_json(
+                oses=data['oses'],
+                organizations=data.get('orgs', []),
+                groups=data.get('groups', []),
+                only_approved=data.get('only_approved', True),
+            )),
+            status=HTTP_200_OK,
+            mimetype='application/json',
+        )
+    return Response(
+        get_cached_pes_json(
+            oses=data['oses'],
+            organizations=data.get('orgs', []),
+            groups=data.get('groups', []),
+            only_approved=data.get('only_approved', True),
+        ),
+        status=HTTP_200_OK,
+        mimetype='application/json',
     )
 
 
-@app.errorhandler(BaseCustomException)
+@success_result
+@error_result
+@validate_json
+def search_actions():
+    return structured_search_actions_handler(request.json)
+
+
+@login_requires
+@membership_requires
+def profiles():
+    data = {
+        'main_title': 'Profiles of requests',
+        'profiles': list_profiles(),
+    }
+    data.update(_prepare_data_dict())
+    return render_template('profiles.html', **data)
+
+
+@login_requires
+@membership_requires
+def profile(name: str):
+    path = get_profile_path(name)
+    if path is None:
+        abort(HTTP_404_NOT_FOUND)
+    if request.args.get('download'):
+        return send_file(path, as_attachment=True)
+    return textify_response(
+        content=get_profile_stats(path),
+        status_code=HTTP_200_OK,
+    )
+
+
+def metrics():
+    return get_metrics()
+
+
 def handle_jwt_exception(error: BaseCustomException) -> Response:
     logger.exception(error.message, *error.args)
     return jsonify_response(
@@ -522,7 +619,6 @@ def handle_jwt_exception(error: BaseCustomException) -> Response:
     )
 
 
-@app.errorhandler(InternalServerError)
 def handle_internal_server_error(error: InternalServerError) -> Response:
     logger.exception(error)
     return jsonify_response(
@@ -533,8 +629,7 @@ def handle_internal_server_error(error: InternalServerError) -> Response:
     )
 
 
-@app.errorhandler(CustomHTTPError)
-def handle_internal_server_error(error: CustomHTTPError) -> Response:
+def handle_custom_http_error(error: CustomHTTPError) -> Response:
     logger.exception(error)
     return jsonify_response(
         result={
@@ -545,6 +640,157 @@ def handle_internal_server_error(error: CustomHTTPError) -> Response:
     )
 
 
+def create_app() -> Flask:
+    """
+    Build the app, its hooks and its routes.
+    It's called once per process, because the hooks of SQL statements
+    and of the pool of connections are global
+    """
+    app = create_flask_application()
+    github.init_app(app)
+    app.teardown_appcontext(close_app_context_session)
+    init_query_stats(app)
+    init_metrics(app=app, engine=Engine.get_instance())
+    app.context_processor(inject_now_date)
+    app.context_processor(inject_pagination_url)
+    app.before_request(before_request)
+    app.register_error_handler(BaseCustomException, handle_jwt_exception)
+    app.register_error_handler(
+        InternalServerError,
+        handle_internal_server_error,
+    )
+    app.register_error_handler(CustomHTTPError, handle_custom_http_error)
+    app.add_url_rule('/github-callback', view_func=authorized)
+    app.add_url_rule('/login', view_func=login, methods=('GET',))
+    app.add_url_rule('/logout', view_func=logout, methods=('GET',))
+    app.add_url_rule('/', view_func=index)
+    app.add_url_rule(
+        '/bulk_upload',
+        view_func=bulk_upload,
+        methods=('GET', 'POST',),
+    )
+    app.add_url_rule('/dump', view_func=dump_json, methods=('GET', 'POST',))
+    app.add_url_rule(
+        '/view_action/<int:action_id>',
+        view_func=view_action,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/add_action',
+        view_func=add_action,
+        methods=('GET', 'POST',),
+    )
+    app.add_url_rule(
+        '/add_group',
+        view_func=add_group,
+        methods=('GET', 'POST',),
+    )
+    app.add_url_rule(
+        '/edit_action/<int:action_id>',
+        view_func=edit_action,
+        methods=('GET', 'POST',),
+    )
+    app.add_url_rule(
+        '/edit_group/<int:group_id>',
+        view_func=edit_group,
+        methods=('GET', 'POST',),
+    )
+    app.add_url_rule('/users', view_func=get_users, methods=('GET',))
+    app.add_url_rule(
+        '/users/<int:page>',
+        view_func=get_users,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/group_of_actions',
+        view_func=get_group_of_actions,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/group_of_actions/<int:page>',
+        view_func=get_group_of_actions,
+        methods=('GET',),
+    )
+    app.add_url_rule('/history', view_func=get_history, methods=('GET',))
+    app.add_url_rule(
+        '/history/<int:page>',
+        view_func=get_history,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/history_by_action/<int:action_id>',
+        view_func=get_history,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/history_by_action/<int:action_id>/<int:page>',
+        view_func=get_history,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/history_by_user/<string:username>',
+        view_func=get_history,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/history_by_user/<string:username>/<int:page>',
+        view_func=get_history,
+        methods=('GET',),
+    )
+    app.add_url_rule('/api/groups', view_func=groups, methods=('DELETE',))
+    app.add_url_rule(
+        '/api/actions',
+        view_func=actions,
+        methods=('GET', 'PUT', 'DELETE', 'POST'),
+    )
+    app.add_url_rule('/actions', view_func=get_list_actions, methods=('GET',))
+    app.add_url_rule(
+        '/actions/<int:page>',
+        view_func=get_list_actions,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/actions/group/<int:group_id>',
+        view_func=get_list_actions,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/actions/group/<int:group_id>/<int:page>',
+        view_func=get_list_actions,
+        methods=('GET',),
+    )
+    app.add_url_rule(
+        '/api/pull_requests',
+        view_func=pull_requests,
+        methods=('POST', 'GET'),
+    )
+    app.add_url_rule(
+        '/api/bulk_upload/<int:job_id>',
+        view_func=bulk_upload_job,
+        methods=('GET',),
+    )
+    app.add_url_rule('/api/dump', view_func=dump, methods=('GET',))
+    app.add_url_rule(
+        '/api/actions/search',
+        view_func=search_actions,
+        methods=('GET', 'POST'),
+    )
+    app.add_url_rule('/profiles', view_func=profiles, methods=('GET',))
+    app.add_url_rule(
+        '/profiles/<string:name>',
+        view_func=profile,
+        methods=('GET',),
+    )
+    app.add_url_rule('/metrics', view_func=metrics, methods=('GET',))
+    init_profiler(app)
+    return app
+
+
+app = create_app()
+if not PRELOAD_APP:
+    init_process()
+
+
 if __name__ == '__main__':
     app.run(
         debug=True,
@@ -0,0 +1,127 @@
+# coding=utf-8
+from __future__ import annotations
+
+import json
+import tempfile
+from types import SimpleNamespace
+from typing import Iterator
+
+import pytest
+from flask import (
+    Flask,
+    g,
+)
+from sqlalchemy.engine import Engine as SQLAlchemyEngine
+from sqlalchemy.orm import Session
+
+from api.handlers import (
+    _load_user_data,
+    bulk_upload_handler,
+    run_bulk_upload_jobs,
+)
+from db.db_models import (
+    Action,
+    Base,
+    BulkUploadJob,
+    GitHubOrg,
+    User,
+)
+from db.utils import close_app_context_session
+
+GITHUB_ORG = {'name': 'AlmaLinux', 'github_id': 77327804}
+
+
+@pytest.fixture
+def app(engine: SQLAlchemyEngine) -> Iterator[Flask]:
+    """
+    App whose handlers commit to the test DB, its tables are cleaned after
+    a test. The uploader is a member of the org of uploaded actions
+    """
+    app = Flask(__name__)
+    app.teardown_appcontext(close_app_context_session)
+    with Session(bind=engine) as session:
+        session.add(User(
+            github_id=1,
+            github_login='uploader',
+            github_orgs=[GitHubOrg(**GITHUB_ORG)],
+        ))
+        session.commit()
+    yield app
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+
+
+def _get_pes_actions(first_id: int) -> list[dict]:
+    return [
+        {
+            'id': action_id,
+            'action': 0,
+            'in_packageset': {'package': [{
+                'name': f'package-{action_id}',
+                'repository': 'baseos',
+                'modulestream': None,
+            }]},
+            'out_packageset': {'package': [{
+                'name': f'package-{action_id}',
+                'repository': 'appstream',
+                'modulestream': None,
+            }]},
+            'initial_release': {
+                'os_name': 'CentOS',
+                'major_version': 7,
+                'minor_version': 9,
+            },
+            'release': {
+                'os_name': 'AlmaLinux',
+                'major_version': 8,
+                'minor_version': 5,
+            },
+            'architectures': ['x86_64'],
+        } for action_id in range(first_id, first_id + 3)
+    ]
+
+
+def _get_approvals(engine: SQLAlchemyEngine) -> dict[str, bool]:
+    with Session(bind=engine) as session:
+        return {
+            action.in_package_set[0].name: action.is_approved
+            for action in session.query(Action)
+        }
+
+
+def test_background_and_sync_uploads_are_approved_alike(
+        app: Flask,
+        engine: SQLAlchemyEngine,
+):
+    bulk_upload_form = SimpleNamespace(org=SimpleNamespace(
+        choices=[(str(GITHUB_ORG['github_id']), GITHUB_ORG['name'])],
+        data=str(GITHUB_ORG['github_id']),
+    ))
+    with app.app_context():
+        g.user_data = _load_user_data(github_id=1)
+        bulk_upload_handler(
+            actions=_get_pes_actions(first_id=0),
+            bulk_upload_form=bulk_upload_form,
+        )
+    with tempfile.NamedTemporaryFile(
+        mode='w',
+        suffix='.json',
+        delete=False,
+    ) as uploaded_file:
+        json.dump({'packageinfo': _get_pes_actions(first_id=3)}, uploaded_file)
+    with Session(bind=engine) as session:
+        BulkUploadJob.create(
+            session=session,
+            username='uploader',
+            user_github_id=1,
+            file_path=uploaded_file.name,
+            github_org=GITHUB_ORG,
+        )
+        session.commit()
+    run_bulk_upload_jobs(app)
+
+    approvals = _get_approvals(engine)
+    assert len(approvals) == 6
+    # the uploader is a member of the org, so all actions are approved
+    assert set(approvals.values()) == {True}
@@ -0,0 +1,130 @@
+# coding=utf-8
+from __future__ import annotations
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine as SQLAlchemyEngine
+from sqlalchemy.orm import Session
+
+from db.data_models import (
+    ActionType,
+    PackageType,
+)
+from db.db_models import (
+    Action,
+    GitHubOrg,
+    Group,
+    ModuleStream,
+    Package,
+    Release,
+)
+
+
+def _create_actions(session: Session, count: int) -> None:
+    """
+    Create approved and not approved actions which have all relations
+    walked by `to_dataclass`
+    """
+    org = GitHubOrg(name='AlmaLinux', github_id=77327804)
+    group = Group(name='group', description='group', github_org=org)
+    source_release = Release(os_name='CentOS', major_version=7,
+                             minor_version=9)
+    target_release = Release(os_name='AlmaLinux', major_version=8,
+                             minor_version=5)
+    for number in range(count * 2):
+        module_stream = ModuleStream(name=f'module-{number}', stream='1')
+        session.add(Action(
+            action=ActionType.replaced,
+            arches='x86_64,aarch64',
+            is_approved=number < count,
+            github_org_rel=org,
+            source_release=source_release,
+            target_release=target_release,
+            in_package_set=[Package(
+                name=f'in-{number}',
+                repository='baseos',
+                type=PackageType.in_package,
+                module_stream=module_stream,
+            )],
+            out_package_set=[
+                Package(
+                    name=f'out-{number}-{index}',
+                    repository='appstream',
+                    type=PackageType.out_package,
+                    module_stream=module_stream,
+                ) for index in range(2)
+            ],
+            groups=[group],
+        ))
+    session.flush()
+    # relations are loaded by queries of a dump, not by the identity map
+    session.expunge_all()
+
+
+def _count_dump_statements(
+        session: Session,
+        count_statements,
+        only_approved: bool,
+        actions_count: int,
+) -> int:
+    with count_statements() as stats:
+        actions = [
+            action.to_dataclass() for action in Action.search_for_dump(
+                session=session,
+                only_approved=only_approved,
+            )
+        ]
+    session.expunge_all()
+    assert len(actions) == actions_count
+    return stats.count
+
+
+def test_count_of_dump_statements_does_not_depend_on_actions(
+        session: Session,
+        count_statements,
+):
+    actions_count = 20
+    _create_actions(session=session, count=actions_count)
+    count_of_n = _count_dump_statements(
+        session=session,
+        count_statements=count_statements,
+        only_approved=True,
+        actions_count=actions_count,
+    )
+    count_of_2n = _count_dump_statements(
+        session=session,
+        count_statements=count_statements,
+        only_approved=False,
+        actions_count=actions_count * 2,
+    )
+
+    assert count_of_n == count_of_2n
+    # relations aren't lazy loaded per an action
+    assert count_of_n < actions_count
+
+
+def test_dump_does_not_load_groups(
+        engine: SQLAlchemyEngine,
+        session: Session,
+):
+    _create_actions(session=session, count=2)
+    statements = []
+
+    def after_cursor_execute(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    try:
+        actions = [
+            action.to_dataclass() for action in Action.search_for_dump(
+                session=session,
+                only_approved=False,
+            )
+        ]
+    finally:
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+
+    assert len(actions) == 4
+    # groups are dropped by a dump, so their members aren't fetched
+    assert not [
+        statement for statement in statements if 'groups' in statement
+    ]
@@ -0,0 +1,145 @@
+# coding=utf-8
+from __future__ import annotations
+
+import json
+from typing import (
+    Callable,
+    Iterator,
+)
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import (
+    Query,
+    Session,
+)
+
+from db.db_models import (
+    Action,
+    ActionHistory,
+    GitHubOrg,
+    Group,
+    ModuleStream,
+    Package,
+    Release,
+    User,
+)
+
+# lookups of relations by `any`/`has` and of lookup columns
+# which are run by listings, dumps, logins and the orphans GC
+HOT_QUERIES = {
+    'actions_by_in_packages': (
+        lambda session: session.query(Action).filter(
+            Action.in_package_set.any(Package.id.in_([1, 2])),
+        ),
+        ['actions_packages_in_package_id_action_id_idx'],
+    ),
+    'actions_by_out_packages': (
+        lambda session: session.query(Action).filter(
+            Action.out_package_set.any(Package.id.in_([1, 2])),
+        ),
+        ['actions_packages_out_package_id_action_id_idx'],
+    ),
+    'actions_by_groups': (
+        lambda session: session.query(Action).filter(
+            Action.groups.any(Group.id.in_([1, 2])),
+        ),
+        ['groups_actions_group_id_action_id_idx'],
+    ),
+    'actions_by_github_orgs': (
+        lambda session: session.query(Action).filter(
+            Action.github_org_rel.has(GitHubOrg.github_id.in_([1, 2])),
+        ),
+        ['github_orgs_github_id_idx', 'actions_github_org_id_id_idx'],
+    ),
+    'users_by_github_orgs': (
+        lambda session: session.query(User).filter(
+            User.github_orgs.any(GitHubOrg.id == 1),
+        ),
+        ['users_github_orgs_github_org_id_user_id_idx'],
+    ),
+    'user_by_github_id': (
+        lambda session: session.query(User).filter_by(github_id=1),
+        ['users_github_id_idx'],
+    ),
+    'history_of_action': (
+        lambda session: session.query(ActionHistory).filter_by(action_id=1),
+        ['actions_history_action_id_idx'],
+    ),
+    'groups_of_github_org': (
+        lambda session: session.query(Group).filter_by(github_org_id=1),
+        ['groups_github_org_id_idx'],
+    ),
+    'orphan_releases': (
+        lambda session: session.query(Release).filter(
+            Release.id.in_([1, 2]),
+            ~Release.actions_target.any(),
+            ~Release.actions_source.any(),
+        ),
+        [
+            'actions_source_release_id_id_idx',
+            'actions_target_release_id_id_idx',
+        ],
+    ),
+    'orphan_packages': (
+        lambda session: session.query(Package).filter(
+            Package.id.in_([1, 2]),
+            ~Package.actions_in.any(),
+            ~Package.actions_out.any(),
+        ),
+        [
+            'actions_packages_in_package_id_action_id_idx',
+            'actions_packages_out_package_id_action_id_idx',
+        ],
+    ),
+    'orphan_modules_streams': (
+        lambda session: session.query(ModuleStream).filter(
+            ModuleStream.id.in_([1, 2]),
+            ~ModuleStream.packages.any(),
+        ),
+        ['packages_module_stream_id_idx'],
+    ),
+}
+
+
+def _iter_plan_nodes(session: Session, query: Query) -> Iterator[dict]:
+    statement = query.statement.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={'literal_binds': True},
+    )
+    plan = session.execute(
+        text(f'EXPLAIN (FORMAT JSON) {statement}'),
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', []))
+        yield node
+
+
+@pytest.mark.parametrize(
+    ('get_query', 'indexes'),
+    HOT_QUERIES.values(),
+    ids=HOT_QUERIES.keys(),
+)
+def test_hot_queries_use_indexes(
+        session: Session,
+        get_query: Callable[[Session], Query],
+        indexes: list[str],
+):
+    # tables of tests are tiny, so a sequential scan is always cheaper.
+    # The planner still chooses it if there's no suitable index
+    session.execute(text('SET LOCAL enable_seqscan = off'))
+    nodes = list(_iter_plan_nodes(session=session, query=get_query(session)))
+
+    seq_scans = [
+        node['Relation Name'] for node in nodes
+        if node['Node Type'] == 'Seq Scan'
+    ]
+    used_indexes = {
+        node['Index Name'] for node in nodes if 'Index Name' in node
+    }
+    assert not seq_scans
+    assert used_indexes.issuperset(indexes)
@@ -0,0 +1,65 @@
+# coding=utf-8
+from __future__ import annotations
+
+from contextlib import ExitStack
+
+from flask import Flask
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy.engine import Engine as SQLAlchemyEngine
+
+from common.metrics import (
+    get_metrics,
+    init_metrics,
+)
+
+POOL_GAUGES = (
+    'pes_db_pool_checked_out',
+    'pes_db_pool_size',
+    'pes_db_pool_overflow',
+)
+
+
+def _get_pool_gauges(app: Flask) -> dict[str, float]:
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    return {
+        sample.name: sample.value
+        for family in text_string_to_metric_families(
+            response.get_data(as_text=True),
+        )
+        for sample in family.samples
+        if sample.name in POOL_GAUGES
+    }
+
+
+def test_pool_gauges(engine: SQLAlchemyEngine):
+    app = Flask(__name__)
+    app.add_url_rule('/metrics', view_func=get_metrics, methods=('GET',))
+    init_metrics(app=app, engine=engine)
+    pool_size = engine.pool.size()
+
+    with ExitStack() as stack:
+        for _ in range(pool_size + 1):
+            stack.enter_context(engine.connect())
+        busy_gauges = _get_pool_gauges(app)
+    idle_gauges = _get_pool_gauges(app)
+    engine.dispose()
+    disposed_gauges = _get_pool_gauges(app)
+
+    assert busy_gauges == {
+        'pes_db_pool_checked_out': pool_size + 1,
+        'pes_db_pool_size': pool_size,
+        'pes_db_pool_overflow': 1,
+    }
+    # a connection beyond the size of the pool is closed when it's returned
+    assert idle_gauges == {
+        'pes_db_pool_checked_out': 0,
+        'pes_db_pool_size': pool_size,
+        'pes_db_pool_overflow': 0,
+    }
+    # a preloading master disposes its pool before fork
+    assert disposed_gauges == {
+        'pes_db_pool_checked_out': 0,
+        'pes_db_pool_size': 0,
+        'pes_db_pool_overflow': 0,
+    }
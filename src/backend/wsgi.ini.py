@@ -1,3 +1,6 @@
+import os
+import shutil
+
 bind = '127.0.0.1:8080'
 workers = 2
 threads = 4
@@ -8,3 +11,35 @@ errorlog = '-'
 timeout = 180
 user = 'webserver'
 name = 'webserver'
+# the app is imported and warmed up once in the master process,
+# workers share its memory
+preload_app = os.environ.get('PRELOAD_APP', 'False') == 'True'
+
+# metrics of a previous run are removed before the master imports the app
+# (see `preload_app`), because metrics are opened on import.
+# The config is read again on reload by SIGHUP, files are kept then
+metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if metrics_dir and 'PES_METRICS_DIR_CLEARED' not in os.environ:
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    if os.geteuid() == 0:
+        # workers are run by `user` and write their own files
+        shutil.chown(metrics_dir, user=user)
+    os.environ['PES_METRICS_DIR_CLEARED'] = 'True'
+
+
+def when_ready(server):
+    if preload_app:
+        from main import warm_up_app
+        warm_up_app()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from main import init_process
+        init_process()
+
+
+def child_exit(server, worker):
+    from common.metrics import mark_process_dead
+    mark_process_dead(worker.pid)